@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+from offline_site import standin_url, create_offline_driver, quit_offline_driver
+from run_history import percentile
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def benchmark_config(config):
+    """Copy of the config with everything that doesn't belong in a benchmark switched off."""
+    config = copy.deepcopy(config)
+    settings = config.setdefault('settings', {})
+    settings.update({
+        'test_mode': False,
+        'skip_time_wait': True,
+        'attach_to_browser': False,
+        'sync_clock_to_server': False,
+        'preflight_check': False,
+        'record_run_history': False,
+        'record_dom_snapshots': False,
+        'keep_browser_open_seconds': 0,
+    })
+    # Real step work only: no simulation, pauses or screenshots
+    config['test_settings'] = {}
+    return config
+
+
+def run_worker(config, url, iterations, worker_id, verbose=False):
+    """
+    Runs in a worker process: one headless browser with a throwaway profile,
+    reused for `iterations` races against the stand-in site.
+    """
+    if not verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    # Imported here so each worker process builds its own bot
+    from main import AdvancedTicketBot
+
+    bot = AdvancedTicketBot(config)
+    bot.calculate_target_date()
+    bot.driver = create_offline_driver(headless=True)
+    bot.driver.implicitly_wait(config['settings'].get('wait_timeout', 3))
+    results = []
+    try:
+        for iteration in range(iterations):
+            # Fresh stand-in state for every race
+            bot.driver.get(url)
+            bot.driver.execute_script("sessionStorage.clear();")
+            bot.step_timings = []
+            bot.confirmation_seconds = None
+            bot.race_seconds = None
+            started = time.perf_counter()
+            try:
+                succeeded = asyncio.run(bot.run_race())
+            except Exception as e:
+                logger.warning(f"Worker {worker_id} iteration {iteration} crashed: {e}")
+                succeeded = False
+            results.append({
+                'worker': worker_id,
+                'iteration': iteration,
+                'succeeded': bool(succeeded),
+                'race_seconds': time.perf_counter() - started,
+                'confirmation_seconds': bot.confirmation_seconds,
+                'steps': bot.step_timings,
+            })
+    finally:
+        quit_offline_driver(bot.driver)
+        bot.driver_executor.shutdown(wait=False)
+        bot.writer_executor.shutdown(wait=True)
+    return results
+
+
+def run_benchmark(config, url, iterations, workers, verbose=False):
+    """Spread the iterations over a pool of worker processes and collect every result."""
+    workers = max(1, min(workers, iterations))
+    shares = [iterations // workers + (1 if i < iterations % workers else 0) for i in range(workers)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_worker, config, url, share, worker_id, verbose)
+                   for worker_id, share in enumerate(shares) if share]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def print_report(results, wall_seconds, workers):
+    """Per-step timings combined across all workers and iterations."""
+    succeeded = [result for result in results if result['succeeded']]
+    print(f"\n{len(results)} races on {workers} worker(s) in {wall_seconds:.1f}s wall clock "
+          f"({len(succeeded)} confirmed)")
+
+    race_times = [result['confirmation_seconds'] or result['race_seconds'] for result in succeeded]
+    if race_times:
+        print(f"Go-time to confirmation: p50 {percentile(race_times, 50):.2f}s, "
+              f"p95 {percentile(race_times, 95):.2f}s")
+
+    steps = {}
+    for result in results:
+        for name, outcome, duration in result['steps']:
+            step = steps.setdefault(name, {'ok': [], 'failed': 0})
+            if outcome == 'ok':
+                step['ok'].append(duration)
+            else:
+                step['failed'] += 1
+
+    print(f"\n{'Step':<28}{'n':>5}{'p50 (s)':>10}{'p95 (s)':>10}{'mean (s)':>10}{'failed':>8}")
+    for name, step in steps.items():
+        values = step['ok']
+        if values:
+            print(f"{name:<28}{len(values):>5}{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}"
+                  f"{sum(values) / len(values):>10.2f}{step['failed']:>8}")
+        else:
+            print(f"{name:<28}{0:>5}{'-':>10}{'-':>10}{'-':>10}{step['failed']:>8}")
+
+
+if __name__ == "__main__":
+    from main import load_config
+
+    parser = argparse.ArgumentParser(description="Headless, parallel benchmark of the race against the offline stand-in site.")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--delay', type=int, default=0, help="Stand-in view render delay in ms (simulated latency)")
+    parser.add_argument('--url', help="Override the start page (default: the offline stand-in site)")
+    parser.add_argument('--json', help="Also write every race's raw timings to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the bot's logs from the workers")
+    args = parser.parse_args()
+
+    config = benchmark_config(load_config())
+    url = args.url or standin_url(delay=args.delay or None)
+    logger.info(f"Benchmarking {args.iterations} races on {args.workers} worker(s) against {url}")
+
+    wall_started = time.perf_counter()
+    results = run_benchmark(config, url, args.iterations, args.workers, args.verbose)
+    print_report(results, time.perf_counter() - wall_started, args.workers)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Raw results written to {args.json}")
@@ -35,11 +35,33 @@ SETTINGS = {
     'vancouver_release_time': '07:00', # <--- SET THIS TO A FUTURE TIME
     'days_ahead': 2,
     'keep_browser_open_seconds': 30, # Keep open longer to see the result
+    'confirmation_timeout': 30,  # seconds to wait for the confirmation screen after Submit
     'test_mode': TEST_MODE,
     'skip_time_wait': SKIP_TIME_WAIT,
     # python indexing, 0 euqates to the first pass type option
     'pass_type_index': 0,
     'visit_time': 'AM', # <-- 3 options, AM, PM, ALL DAY
+    # Ranked fallbacks: the first open option is taken. Leave empty to use the single values above.
+    'days_ahead_preferences': [],  # e.g. [2, 3]
+    'visit_time_preferences': [],  # e.g. ['AM', 'ALL DAY', 'PM']
+    'pass_type_preferences': [],  # pass type texts and/or indexes, e.g. ['Trail', 0]
+    # Set pass type, time slot and click Next in one in-page step (False = three separate steps)
+    'atomic_booking_form': True,
+    # Reuse a Chrome already running on this debugging port (starts one if none is found).
+    # Off by default: it leaves a Chrome with the cf-clearance profile running after each run.
+    'attach_to_browser': False,
+    'debugger_port': 9222,
+    # Align the release timer with the booking server's clock (HTTP Date header)
+    'sync_clock_to_server': True,
+    # Watchdog: a step running longer than this is interrupted and recovered
+    'step_budget_seconds': 30,
+    # Save every run's step timings to run_history.sqlite3 (see: python run_history.py report)
+    'record_run_history': True,
+    # During warm-up, check every selector on the pages reachable without booking
+    'preflight_check': True,
+    'preflight_min_lead_seconds': 120,  # skip the check if release is closer than this
+    # Save the page's DOM at each step's entry and exit to dom_snapshots/ (for regression fixtures)
+    'record_dom_snapshots': False,
 }
 
 # Test-specific settings will be IGNORED because TEST_MODE is False
@@ -47,7 +69,10 @@ TEST_SETTINGS = {
     'simulate_steps': False,
     'verbose_logging': True,
     'step_by_step': False,
-    'screenshot_steps': True
+    'screenshot_steps': True,
+    # With simulate_steps, sample step times from a profile instead of a flat 1s
+    'latency_profile': None,  # e.g. 'latency_profile.example.json'
+    'latency_from_history': False,  # or sample from run_history.sqlite3
 }
 
 # Complete config dictionary
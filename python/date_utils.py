@@ -13,12 +13,102 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
+import site_selectors as sel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class DateUtilMixin:
+    VALID_TIME_SLOTS = ['ALL DAY', 'AM', 'PM']
+
+    def preference_list(self, list_key, single_key, default):
+        """
+        Ranked preferences from settings[list_key], falling back to the
+        single-value setting (e.g. days_ahead) when no list is configured.
+        """
+        settings = self.config.get('settings', {})
+        preferences = settings.get(list_key)
+        if preferences:
+            return list(preferences)
+        return [settings.get(single_key, default)]
+
+    def candidate_visit_dates(self):
+        """Visit dates in preference order, from days_ahead_preferences."""
+        today = datetime.now()
+        return [today + timedelta(days=offset)
+                for offset in self.preference_list('days_ahead_preferences', 'days_ahead', 2)]
+
+    def read_open_days(self):
+        """
+        Read the whole displayed calendar in one call.
+        Returns {date: is_open} for every day shown, or None if it can't be read.
+        """
+        days = self.driver.execute_script("""
+            return Array.from(document.querySelectorAll('.ngb-dp-day[aria-label], [role="gridcell"][aria-label]'))
+                .filter(el => !el.classList.contains('hidden'))
+                .map(el => ({
+                    label: el.getAttribute('aria-label'),
+                    disabled: el.classList.contains('disabled') || el.getAttribute('aria-disabled') === 'true'
+                        || !!el.querySelector('.text-muted, .disabled')
+                }));
+        """) or []
+        open_days = {}
+        for day in days:
+            try:
+                open_days[datetime.strptime(day['label'], '%A, %B %d, %Y').date()] = not day['disabled']
+            except (ValueError, TypeError):
+                continue
+        return open_days or None
+
+    def choose_visit_date(self):
+        """
+        Pick the best open date from the ranked preferences using one calendar read.
+        A preferred date outside the displayed month can't be checked, so it is tried as is.
+        """
+        candidates = self.candidate_visit_dates()
+        try:
+            open_days = self.read_open_days()
+        except Exception as e:
+            logger.debug(f"Could not read calendar availability: {e}")
+            open_days = None
+
+        if open_days is None:
+            return candidates[0]
+
+        for candidate in candidates:
+            is_open = open_days.get(candidate.date())
+            if is_open is None or is_open:
+                return candidate
+            logger.info(f"Preferred date {candidate.strftime('%Y-%m-%d')} is not available.")
+
+        logger.warning("None of the preferred dates are open. Trying the first preference anyway.")
+        return candidates[0]
+
+    def preferred_time_slots(self):
+        """Ranked visit time slots from the config, upper-cased. A missing visit_time gives ['']."""
+        return [str(slot).upper() for slot in self.preference_list('visit_time_preferences', 'visit_time', '')]
+
+    def pass_type_preferences(self):
+        """Ranked pass type texts and/or indexes, falling back to pass_type_text then pass_type_index."""
+        settings = self.config.get('settings', {})
+        preferences = settings.get('pass_type_preferences')
+        if preferences:
+            return list(preferences)
+        pass_type_text = settings.get('pass_type_text', '')
+        return ([pass_type_text] if pass_type_text else []) + [settings.get('pass_type_index', 0)]
+
+    def read_open_time_slots(self):
+        """Return the visitTime values (e.g. 'AM', 'DAY') that can currently be selected."""
+        return self.driver.execute_script("""
+            return Array.from(document.querySelectorAll("input[type='radio'][name='visitTime']"))
+                .filter(radio => {
+                    const header = radio.closest('.card-header');
+                    return !radio.disabled && (!header || header.classList.contains('card-header-enabled'));
+                })
+                .map(radio => radio.value);
+        """) or []
+
     def select_park_and_book(self):
         def _select_and_book():
             try:
@@ -38,10 +128,11 @@ class DateUtilMixin:
                 wait = WebDriverWait(self.driver, wait_timeout)
                 
                 # Specific selector for the button after the park name
-                selector = f"//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{search_text.lower()}')]//following::button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'book a pass')][1]"
+                selector = sel.PARK_BOOK_BUTTON_XPATH.format(search_text=search_text.lower())
                 
                 try:
                     book_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
+                    self.note_selector(selector)
                     logger.info(f"Found booking button: {book_button.text}")
                 except TimeoutException:
                     logger.error(f"Could not find 'Book a Pass' button for {park_name}")
@@ -73,7 +164,7 @@ class DateUtilMixin:
                 wait = WebDriverWait(self.driver, wait_timeout)
                 
                 # Locate the "Visit Date" label
-                label_selector = "//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'visit date') and (self::label or self::span or self::div or self::p)]"
+                label_selector = sel.VISIT_DATE_LABEL_XPATH
                 try:
                     label_element = wait.until(EC.presence_of_element_located((By.XPATH, label_selector)))
                     logger.info("Found Visit Date label element")
@@ -83,7 +174,7 @@ class DateUtilMixin:
                     return False
                 
                 # Locate the calendar button following the label
-                date_button_selector = "//*[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'visit date')]//following::button[contains(@class, 'date-input__calendar-btn') and contains(@class, 'form-control') and @title='Select a Date'][1]"
+                date_button_selector = sel.VISIT_DATE_BUTTON_XPATH
                 try:
                     date_button = wait.until(EC.element_to_be_clickable((By.XPATH, date_button_selector)))
                     logger.info("Found Visit Date button element")
@@ -107,19 +198,7 @@ class DateUtilMixin:
                     time.sleep(1)
                 
                 # Wait for the date table to be visible with Angular Bootstrap selectors
-                date_table_selectors = [
-                    "div[ngbdatepickerdayview]",  # Angular Bootstrap specific
-                    "ngb-datepicker",
-                    "[class*='ngb-dp']",
-                    ".datepicker-days",
-                    ".table-condensed", 
-                    "[class*='calendar-days']",
-                    "[role='application'][class*='datepicker']",
-                    ".datepicker",
-                    ".calendar-table",
-                    "table[class*='calendar']",
-                    ".date-picker-table"
-                ]
+                date_table_selectors = sel.DATE_TABLE_SELECTORS
                 
                 date_table_found = False
                 for selector in date_table_selectors:
@@ -137,6 +216,12 @@ class DateUtilMixin:
                     return False
                 
                 time.sleep(0.5)  # Allow table to fully render
+
+                # Pick the best open date from the preferences in a single calendar read
+                chosen_date = self.choose_visit_date()
+                if chosen_date.date() != self.target_date.date():
+                    logger.info(f"Falling back to visit date {chosen_date.strftime('%Y-%m-%d')}")
+                self.target_date = chosen_date
                 
                 # Calculate target date components
                 today = datetime.now()
@@ -156,18 +241,7 @@ class DateUtilMixin:
                     logger.info(f"Need to navigate from {current_month}/{current_year} to {target_month}/{target_year}")
                     
                     # Multiple selectors for the "next" button
-                    next_button_selectors = [
-                        ".datepicker-days .next",
-                        ".next",
-                        "th.next",
-                        "[class*='next']",
-                        "//th[@class='next'][1]",
-                        "//button[contains(@class, 'next')]",
-                        "//a[contains(@class, 'next')]",
-                        ".datepicker-switch + .next",
-                        "th[title*='next']",
-                        "th[title*='Next']"
-                    ]
+                    next_button_selectors = sel.NEXT_MONTH_SELECTORS
                     
                     months_to_advance = (target_year - current_year) * 12 + (target_month - current_month)
                     
@@ -199,18 +273,7 @@ class DateUtilMixin:
                             return False
                 
                 # Now select the target day with Angular Bootstrap ngb-datepicker selectors
-                day_selectors = [
-                    # Angular Bootstrap ngb-datepicker specific selectors
-                    f"//div[@ngbdatepickerdayview and normalize-space(text())='{target_day}']",
-                    f"//div[contains(@ngbdatepickerdayview, '') and normalize-space(text())='{target_day}']",
-                    f"//div[@ngbdatepickerdayview='' and text()='{target_day}']",
-                    # More generic Angular Bootstrap selectors
-                    f"//div[contains(@class, 'btn-light') and normalize-space(text())='{target_day}']",
-                    f"//div[contains(@class, 'btn') and normalize-space(text())='{target_day}']",
-                    # Fallback to traditional selectors
-                    f"//td[contains(@class, 'day') and not(contains(@class, 'old')) and not(contains(@class, 'new')) and not(contains(@class, 'disabled')) and normalize-space(text())='{target_day}']",
-                    f"//button[normalize-space(text())='{target_day}' and contains(@class, 'day')]"
-                ]
+                day_selectors = [selector.format(target_day=target_day) for selector in sel.DAY_XPATH_SELECTORS]
                 
                 day_element = None
                 selector_used = None
@@ -219,6 +282,7 @@ class DateUtilMixin:
                     try:
                         day_element = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
                         selector_used = selector
+                        self.note_selector(selector)
                         logger.info(f"Found day element for {target_day} using selector: {selector}")
                         break
                     except:
@@ -228,7 +292,7 @@ class DateUtilMixin:
                 if not day_element:
                     try:
                         # Get all Angular Bootstrap day elements
-                        day_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[ngbdatepickerdayview], div.btn-light, div[class*='btn']")
+                        day_elements = self.driver.find_elements(By.CSS_SELECTOR, sel.DAY_CSS_FALLBACK)
                         logger.info(f"Found {len(day_elements)} potential Angular Bootstrap day elements")
                         
                         for element in day_elements:
@@ -248,6 +312,7 @@ class DateUtilMixin:
                                     element.is_displayed()):
                                     day_element = element
                                     selector_used = "Angular Bootstrap CSS filtering"
+                                    self.note_selector(selector_used)
                                     logger.info(f"Found day element for {target_day} using Angular Bootstrap CSS selector with filtering")
                                     break
                                 else:
@@ -307,13 +372,7 @@ class DateUtilMixin:
                     return False
                 
                 # Verify the input field updated correctly with multiple possible input selectors
-                input_selectors = [
-                    "//input[@id='visitDate']",
-                    "//input[contains(@name, 'visit')]",
-                    "//input[contains(@name, 'date')]",
-                    "//input[@type='date']",
-                    "//input[contains(@class, 'date')]"
-                ]
+                input_selectors = sel.DATE_INPUT_XPATHS
                 
                 verification_successful = False
                 for input_selector in input_selectors:
@@ -367,32 +426,49 @@ class DateUtilMixin:
         def _select_time():
             try:
                 # Define allowed visit time options
-                valid_time_slots = ['ALL DAY', 'AM', 'PM']
+                valid_time_slots = self.VALID_TIME_SLOTS
                 
-                # Get the desired time slot from the config
-                time_slot_value = self.config.get('settings', {}).get('visit_time', '').upper()
+                # Get the ranked time slots from the config
+                preferred_slots = self.preferred_time_slots()
                 
-                # Validate the time slot
-                if not time_slot_value or time_slot_value not in valid_time_slots:
-                    logger.error(f"Invalid or missing visit time in config: '{time_slot_value}'. Valid options are: {valid_time_slots}")
+                # Validate the time slots
+                invalid_slots = [slot for slot in preferred_slots if slot not in valid_time_slots]
+                if invalid_slots:
+                    logger.error(f"Invalid or missing visit time in config: {invalid_slots}. Valid options are: {valid_time_slots}")
                     self.take_screenshot("invalid_visit_time")
                     return False
-                    
-                logger.info(f"Selecting visit time slot: {time_slot_value}")
                 
                 wait_timeout = self.config.get('settings', {}).get('wait_timeout', 15)
                 wait = WebDriverWait(self.driver, wait_timeout)
 
+                # Read which slots are open once, then take the best one
+                time_slot_value = preferred_slots[0]
+                try:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, sel.VISIT_TIME_ANY_RADIO)))
+                    open_slots = self.read_open_time_slots()
+                    logger.info(f"Open time slots: {open_slots}")
+                    for slot in preferred_slots:
+                        if ('DAY' if slot == 'ALL DAY' else slot) in open_slots:
+                            time_slot_value = slot
+                            break
+                    else:
+                        logger.warning(f"None of the preferred time slots {preferred_slots} look open. Trying {time_slot_value} anyway.")
+                except TimeoutException:
+                    logger.warning("Could not read time slot availability. Using the first preference.")
+
+                logger.info(f"Selecting visit time slot: {time_slot_value}")
+
                 # Map config value to HTML value (ALL DAY -> DAY)
                 selector_value = 'DAY' if time_slot_value == 'ALL DAY' else time_slot_value
                 
                 # Selector for the parent <div> containing the radio button with the correct value
-                div_selector = f"div.card-header.card-header-enabled:has(input[type='radio'][name='visitTime'][value='{selector_value}'])"
-                radio_selector = f"input[type='radio'][name='visitTime'][value='{selector_value}']"
+                div_selector = sel.VISIT_TIME_HEADER_CSS.format(value=selector_value)
+                radio_selector = sel.VISIT_TIME_RADIO_CSS.format(value=selector_value)
 
                 try:
                     # First, try clicking the parent <div>
                     header_div = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, div_selector)))
+                    self.note_selector(div_selector)
                     
                     # Scroll to the element to ensure it's in view
                     self.driver.execute_script("arguments[0].scrollIntoView(true);", header_div)
@@ -409,6 +485,7 @@ class DateUtilMixin:
                     # Fallback: Try clicking the radio button directly
                     try:
                         time_radio = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, radio_selector)))
+                        self.note_selector(radio_selector)
                         self.driver.execute_script("arguments[0].scrollIntoView(true);", time_radio)
                         time.sleep(0.5)
                         self.driver.execute_script("arguments[0].click();", time_radio)
@@ -431,58 +508,57 @@ class DateUtilMixin:
         """Select pass type based on configuration (index or text)"""
         def _select_pass():
             try:
-                # Get configuration settings
-                pass_type_index = self.config.get('settings', {}).get('pass_type_index', 0)
-                pass_type_text = self.config.get('settings', {}).get('pass_type_text', '')
+                # Get configuration settings: ranked texts and/or indexes
+                preferences = self.pass_type_preferences()
                 
-                if pass_type_text:
-                    logger.info(f"Looking for pass type containing: '{pass_type_text}'")
-                else:
-                    logger.info(f"Selecting pass type at index: {pass_type_index}")
+                logger.info(f"Pass type preferences: {preferences}")
                 
                 wait_timeout = self.config.get('settings', {}).get('wait_timeout', 10)
                 wait = WebDriverWait(self.driver, wait_timeout)
                 
                 # Target the pass type dropdown
-                pass_selector = "select[name*='pass'], select[name*='type'], select[id*='pass'], select[id*='type'], .pass-type select"
+                pass_selector = ", ".join(sel.PASS_TYPE_SELECTORS)
                 pass_element = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, pass_selector)))
+                self.note_selector(pass_selector)
                 
                 if pass_element.tag_name == 'select':
                     select = Select(pass_element)
-                    options = select.options
-                    valid_options = [opt for opt in options[1:] if opt.get_attribute('value') and opt.get_attribute('value') != '']
+                    # Read every option once (text and availability) instead of per-option round trips
+                    options = self.driver.execute_script("""
+                        return Array.from(arguments[0].options).slice(1)
+                            .filter(opt => opt.value)
+                            .map(opt => ({value: opt.value, text: opt.text.trim(), disabled: opt.disabled}));
+                    """, pass_element)
                     
                     # Log available options for debugging
-                    logger.info(f"Found {len(valid_options)} pass type options:")
-                    for i, opt in enumerate(valid_options):
-                        logger.info(f"  Option {i}: {opt.text}")
+                    logger.info(f"Found {len(options)} pass type options:")
+                    for i, opt in enumerate(options):
+                        logger.info(f"  Option {i}: {opt['text']}{' (unavailable)' if opt['disabled'] else ''}")
                     
                     selected_option = None
                     
-                    # Priority 1: Select by text if specified
-                    if pass_type_text:
-                        for option in valid_options:
-                            if pass_type_text.lower() in option.text.lower():
-                                selected_option = option
-                                logger.info(f"Found matching pass type by text: {option.text}")
-                                break
-                        
-                        if not selected_option:
-                            logger.warning(f"Could not find pass type containing '{pass_type_text}'. Falling back to index selection.")
+                    # Take the first preference that matches an enabled option
+                    for preference in preferences:
+                        if isinstance(preference, int):
+                            # Python indexing, so -1 is the last option
+                            matches = [options[preference]] if -len(options) <= preference < len(options) else []
+                        else:
+                            matches = [opt for opt in options if str(preference).lower() in opt['text'].lower()]
+                        open_matches = [opt for opt in matches if not opt['disabled']]
+                        if open_matches:
+                            selected_option = open_matches[0]
+                            logger.info(f"Matched pass type preference {preference!r}: {selected_option['text']}")
+                            break
+                        logger.info(f"Pass type preference {preference!r} is not available.")
                     
-                    # Priority 2: Select by index
                     if not selected_option:
-                        if len(valid_options) > pass_type_index:
-                            selected_option = valid_options[pass_type_index]
-                            logger.info(f"Selected pass type by index {pass_type_index}: {selected_option.text}")
-                        else:
-                            logger.error(f"Pass type index {pass_type_index} not available. Found {len(valid_options)} options.")
-                            return False
+                        logger.error(f"None of the pass type preferences {preferences} are available. Found {len(options)} options.")
+                        return False
                     
                     # Make the selection
                     if selected_option:
-                        select.select_by_value(selected_option.get_attribute('value'))
-                        logger.info(f"✅ Selected pass type: {selected_option.text}")
+                        select.select_by_value(selected_option['value'])
+                        logger.info(f"✅ Selected pass type: {selected_option['text']}")
                         time.sleep(0.5)
                         return True
                     else:
@@ -505,16 +581,7 @@ class DateUtilMixin:
             try:
                 logger.info("Clicking Next button...")
                 
-                next_selectors = [
-                    "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'next')]",
-                    "//input[@type='submit' and contains(translate(@value, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'next')]",
-                    "//a[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'next')]",
-                    "button[id*='next']",
-                    "button[class*='next']",
-                    ".next-btn",
-                    ".btn-next",
-                    "input[type='submit']"
-                ]
+                next_selectors = sel.NEXT_BUTTON_SELECTORS
                 
                 wait_timeout = self.config.get('settings', {}).get('wait_timeout', 10)
                 wait = WebDriverWait(self.driver, wait_timeout)
@@ -526,6 +593,7 @@ class DateUtilMixin:
                         else:
                             next_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
                         
+                        self.note_selector(selector)
                         next_button.click()
                         logger.info("Next button clicked successfully")
                         time.sleep(3)  # Wait for page to load
@@ -542,3 +610,152 @@ class DateUtilMixin:
         
         return self.simulate_step("Click Next Button", _click_next)
 
+    def complete_booking_form(self):
+        """
+        Pass type, time slot and Next as one in-page operation. Sets the pass type and
+        the visitTime radio with the events Angular listens for, checks that the form
+        is valid, clicks Next and returns once the contact form is present.
+        On failure it logs exactly which part failed.
+        """
+        def _complete_form():
+            if not self.config.get('settings', {}).get('atomic_booking_form', True):
+                return self.select_pass_type() and self.select_visit_time() and self.click_next_button()
+
+            try:
+                wait_timeout = self.config.get('settings', {}).get('wait_timeout', 10)
+                preferred_slots = self.preferred_time_slots()
+                invalid_slots = [slot for slot in preferred_slots if slot not in self.VALID_TIME_SLOTS]
+                if invalid_slots:
+                    logger.error(f"Invalid or missing visit time in config: {invalid_slots}. Valid options are: {self.VALID_TIME_SLOTS}")
+                    return False
+                slot_preferences = ['DAY' if slot == 'ALL DAY' else slot for slot in preferred_slots]
+                logger.info(f"Applying pass type {self.pass_type_preferences()} and time slot {slot_preferences} in one step...")
+
+                # The script waits in the page for the form to render; restore the session's
+                # timeout afterwards so later execute_script calls keep their usual limit
+                previous_script_timeout = self.driver.timeouts.script
+                self.driver.set_script_timeout(wait_timeout + 5)
+                try:
+                    outcome = self.driver.execute_async_script(
+                        BOOKING_FORM_SCRIPT,
+                        ", ".join(sel.PASS_TYPE_SELECTORS),
+                        self.pass_type_preferences(),
+                        slot_preferences,
+                        sel.VISIT_TIME_ANY_RADIO,
+                        sel.NEXT_BUTTON_SELECTORS,
+                        wait_timeout * 1000,
+                    )
+                finally:
+                    self.driver.set_script_timeout(previous_script_timeout)
+
+                if not outcome['ok']:
+                    logger.error(f"❌ Booking form stage failed at '{outcome['part']}': {outcome['detail']}")
+                    self.take_screenshot(f"booking_form_{outcome['part']}")
+                    if outcome['part'] in ('visit_time', 'validation', 'next', 'script'):
+                        # The step-by-step path uses real clicks and its own waits, so it may still get through
+                        logger.info("Falling back to step-by-step pass type, time slot and Next...")
+                        return self.select_pass_type() and self.select_visit_time() and self.click_next_button()
+                    return False
+
+                self.note_selector(outcome['next_selector'])
+                logger.info(f"Pass type '{outcome['pass_type']}' and time slot {outcome['slot']} applied, Next clicked.")
+
+                wait = WebDriverWait(self.driver, wait_timeout)
+                try:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(sel.FIRST_NAME_SELECTORS))))
+                except TimeoutException:
+                    logger.error("❌ Booking form stage failed at 'contact_form': Next was clicked but the contact form did not appear.")
+                    self.take_screenshot("booking_form_contact_form")
+                    return False
+
+                logger.info("✅ Booking form complete. Contact form is ready.")
+                return True
+
+            except Exception as e:
+                logger.error(f"Failed to complete booking form: {e}")
+                self.take_screenshot("booking_form_failed")
+                return False
+
+        return self.simulate_step("Complete Booking Form", _complete_form)
+
+
+# Runs in the page via execute_async_script. Arguments: pass type CSS, pass type
+# preferences, time slot values, visitTime radio CSS, Next selectors, timeout (ms), callback.
+# Calls back with {ok: true, ...} or {ok: false, part, detail}.
+BOOKING_FORM_SCRIPT = """
+const [passSelector, passPreferences, slotPreferences, radioSelector, nextSelectors, timeoutMs, done] = arguments;
+const deadline = Date.now() + timeoutMs;
+const tick = () => new Promise(resolve => setTimeout(resolve, 16));
+const find = selector => (selector.startsWith('//') || selector.startsWith('('))
+    ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+    : document.querySelector(selector);
+const fail = (part, detail) => done({ok: false, part: part, detail: detail});
+
+(async () => {
+    // Set the pass type as soon as the dropdown renders; the time slots may depend on it
+    let select = null;
+    while (!(select = document.querySelector(passSelector)) && Date.now() < deadline) {
+        await tick();
+    }
+    if (!select) return fail('pass_type', 'pass type dropdown not found');
+
+    // Pass type: first preference (text or index) that matches an enabled option
+    const options = Array.from(select.options).slice(1).filter(opt => opt.value);
+    let option = null;
+    for (const preference of passPreferences) {
+        // Indexes follow Python indexing, so -1 is the last option
+        const index = typeof preference === 'number' && preference < 0 ? options.length + preference : preference;
+        const matches = typeof preference === 'number'
+            ? (index >= 0 ? options.slice(index, index + 1) : [])
+            : options.filter(opt => opt.text.toLowerCase().includes(String(preference).toLowerCase()));
+        option = matches.find(opt => !opt.disabled);
+        if (option) break;
+    }
+    if (!option) {
+        return fail('pass_type', 'no preferred pass type available; options: ' +
+            options.map(opt => opt.text.trim() + (opt.disabled ? ' (unavailable)' : '')).join(', '));
+    }
+    select.value = option.value;
+    select.dispatchEvent(new Event('input', {bubbles: true}));
+    select.dispatchEvent(new Event('change', {bubbles: true}));
+
+    let radios = [];
+    while (!(radios = Array.from(document.querySelectorAll(radioSelector))).length && Date.now() < deadline) {
+        await tick();
+    }
+    if (!radios.length) return fail('visit_time', 'no visitTime radios on the page');
+
+    // Time slot: first preference whose card header is enabled
+    const open = radios.filter(radio => {
+        const header = radio.closest('.card-header');
+        return !radio.disabled && (!header || header.classList.contains('card-header-enabled'));
+    });
+    const radio = slotPreferences.map(slot => open.find(r => r.value === slot)).find(Boolean);
+    if (!radio) {
+        return fail('visit_time', 'no preferred time slot open; open slots: ' + (open.map(r => r.value).join(', ') || 'none'));
+    }
+    if (!radio.checked) radio.click();  // a real click fires input and change
+    if (!radio.checked) {
+        radio.checked = true;
+        radio.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+
+    // Give Angular a turn to run change detection, then check the form
+    await tick();
+    const form = select.closest('form');
+    if (form && (form.classList.contains('ng-invalid') || !form.checkValidity())) {
+        const invalid = Array.from(form.querySelectorAll('.ng-invalid, :invalid'))
+            .map(el => el.getAttribute('formcontrolname') || el.name || el.id || el.tagName.toLowerCase());
+        return fail('validation', 'form is still invalid: ' + (invalid.join(', ') || 'unknown field'));
+    }
+
+    for (const selector of nextSelectors) {
+        const button = find(selector);
+        if (button && button.offsetParent !== null && !button.disabled) {
+            button.click();
+            return done({ok: true, pass_type: option.text.trim(), slot: radio.value, next_selector: selector});
+        }
+    }
+    return fail('next', 'Next button not found or disabled');
+})().catch(error => fail('script', String(error)));
+"""
@@ -0,0 +1,159 @@
+import argparse
+import gzip
+import hashlib
+import html as html_lib
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dom_snapshots")
+
+SNAPSHOT_SCRIPT = """
+    return {
+        html: document.documentElement.outerHTML,
+        url: location.href,
+        title: document.title,
+        viewport: {
+            width: window.innerWidth,
+            height: window.innerHeight,
+            scrollX: window.scrollX,
+            scrollY: window.scrollY,
+            devicePixelRatio: window.devicePixelRatio
+        }
+    };
+"""
+
+# Replayed fixtures must never reach the network or re-run the site's scripts. That makes them
+# static: good for selector checks (preflight.py --fixtures), not for running or benchmarking the race.
+FIXTURE_CSP = "<meta http-equiv=\"Content-Security-Policy\" content=\"default-src 'none'; style-src 'unsafe-inline'; img-src data:\">"
+
+
+class DomRecorder:
+    """
+    Saves the serialized DOM (outerHTML, URL, viewport) at step entry and exit.
+    Pages are stored once per content hash, gzip-compressed, under
+    <snapshot dir>/<run>/pages/, and listed in order in <run>/manifest.jsonl.
+    """
+
+    def __init__(self, snapshot_dir=DEFAULT_SNAPSHOT_DIR, run_name=None):
+        self.run_dir = os.path.join(snapshot_dir, run_name or datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.pages_dir = os.path.join(self.run_dir, "pages")
+        os.makedirs(self.pages_dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.run_dir, "manifest.jsonl")
+        self.seen_hashes = {name.split('.')[0] for name in os.listdir(self.pages_dir)}
+        self.sequence = 0
+
+    def capture(self, driver):
+        """Serialize the current page. Runs on the driver thread; returns the raw snapshot."""
+        return driver.execute_script(SNAPSHOT_SCRIPT)
+
+    def save(self, snapshot, step_name, phase):
+        """Hash, compress and record a snapshot (safe to run on a background thread)."""
+        html = "<!DOCTYPE html>\n" + snapshot['html']
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self.seen_hashes:
+            with gzip.open(os.path.join(self.pages_dir, f"{digest}.html.gz"), 'wb') as f:
+                f.write(data)
+            self.seen_hashes.add(digest)
+
+        self.sequence += 1
+        entry = {
+            'seq': self.sequence,
+            'step': step_name,
+            'phase': phase,
+            'url': snapshot['url'],
+            'title': snapshot['title'],
+            'viewport': snapshot['viewport'],
+            'hash': digest,
+            'bytes': len(data),
+            'captured_at': datetime.now().isoformat(timespec='milliseconds'),
+        }
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def make_static(html, source_url):
+    """Strip scripts and block network access so a snapshot replays as a static page."""
+    html = re.sub(r'<script\b[^>]*>.*?</script\s*>', '', html, flags=re.IGNORECASE | re.DOTALL)
+    html = re.sub(r'<base\b[^>]*>', '', html, flags=re.IGNORECASE)
+    head = f"{FIXTURE_CSP}<meta name=\"snapshot-source\" content=\"{html_lib.escape(source_url)}\">"
+    if re.search(r'<head\b[^>]*>', html, flags=re.IGNORECASE):
+        return re.sub(r'(<head\b[^>]*>)', lambda m: m.group(1) + head, html, count=1, flags=re.IGNORECASE)
+    return head + html
+
+
+def build_fixtures(run_dir, out_dir=None):
+    """
+    Turn a recorded run into static fixture pages plus an index.json listing
+    step, phase, URL, viewport and file for each snapshot, in run order.
+    """
+    out_dir = out_dir or os.path.join(run_dir, "fixtures")
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(run_dir, "manifest.jsonl")
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    files_by_hash = {}
+    index = []
+    for entry in entries:
+        # Identical pages share one fixture file, named after their first appearance
+        if entry['hash'] not in files_by_hash:
+            filename = f"{entry['seq']:03d}_{slugify(entry['step'])}_{entry['phase']}.html"
+            with gzip.open(os.path.join(run_dir, "pages", f"{entry['hash']}.html.gz"), 'rb') as f:
+                html = f.read().decode('utf-8')
+            with open(os.path.join(out_dir, filename), 'w', encoding='utf-8') as f:
+                f.write(make_static(html, entry['url']))
+            files_by_hash[entry['hash']] = filename
+        index.append({
+            'step': entry['step'],
+            'phase': entry['phase'],
+            'url': entry['url'],
+            'viewport': entry['viewport'],
+            'file': files_by_hash[entry['hash']],
+        })
+
+    with open(os.path.join(out_dir, "index.json"), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    logger.info(f"Wrote {len(files_by_hash)} fixture pages for {len(index)} snapshots to {out_dir}")
+    return out_dir
+
+
+def load_fixture_index(fixtures_dir):
+    with open(os.path.join(fixtures_dir, "index.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def replay_fixture(driver, fixtures_dir, fixture):
+    """Open a fixture page at the viewport size it was recorded with."""
+    viewport = fixture.get('viewport') or {}
+    if viewport.get('width') and viewport.get('height'):
+        driver.set_window_size(viewport['width'], viewport['height'])
+    driver.get(Path(fixtures_dir, fixture['file']).resolve().as_uri())
+    if viewport.get('scrollY'):
+        driver.execute_script("window.scrollTo(arguments[0], arguments[1]);",
+                              viewport.get('scrollX', 0), viewport['scrollY'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DOM snapshot tools.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fixtures_parser = subparsers.add_parser('fixtures', help="Turn a recorded run into replayable fixture pages")
+    fixtures_parser.add_argument('run_dir', help="A run folder under dom_snapshots/")
+    fixtures_parser.add_argument('--out', help="Output folder (default: <run_dir>/fixtures)")
+    args = parser.parse_args()
+
+    if args.command == 'fixtures':
+        build_fixtures(args.run_dir, args.out)
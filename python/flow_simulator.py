@@ -0,0 +1,222 @@
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import logging
+
+from run_history import DEFAULT_DB_PATH, percentile, run_filter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# The race after go-time, in order: (step name, bot method, retried once after a refresh).
+# run_complete_flow walks this list, so the simulation always matches the real flow.
+RACE_STEPS = [
+    ("Select Park and Book", "select_park_and_book", False),
+    ("Select Visit Date", "select_visit_date", True),
+    ("Complete Booking Form", "complete_booking_form", False),
+    ("Fill Form Details", "fill_form_details", False),
+    ("Accept Terms", "accept_terms_and_conditions", False),
+    ("Submit Form", "submit_form", False),
+    ("Confirm Booking", "confirm_booking", False),
+]
+
+REFRESH_STEP = "Refresh Site"
+
+
+class StepLatency:
+    """
+    Latency distribution and failure rate for one step. retry_fraction is the share
+    of failures that hang or raise, which the race refreshes and retries for steps
+    marked retry_after_refresh. retries_recorded means the samples already include
+    any retry (run history logs one row per step, retry and all).
+    """
+
+    def __init__(self, samples=None, p50=None, p95=None, fail_rate=0.0, fail_samples=None, fail_seconds=None,
+                 retry_fraction=0.0, retries_recorded=False):
+        self.samples = samples or []
+        self.fail_samples = fail_samples or []
+        self.fail_rate = fail_rate
+        self.fail_seconds = fail_seconds
+        self.retry_fraction = retry_fraction
+        self.retries_recorded = retries_recorded
+        self.mu = self.sigma = None
+        if not self.samples and p50:
+            # Lognormal through the given p50 and p95 (1.645 = z-score of the 95th percentile)
+            self.mu = math.log(p50)
+            self.sigma = max(math.log(p95 / p50) / 1.645, 0.01) if p95 and p95 > p50 else 0.01
+
+    def sample_success(self, rng):
+        if self.samples:
+            return rng.choice(self.samples)
+        if self.mu is not None:
+            return rng.lognormvariate(self.mu, self.sigma)
+        return 0.0
+
+    def sample_failure(self, rng):
+        if self.fail_samples:
+            return rng.choice(self.fail_samples)
+        if self.fail_seconds is not None:
+            return self.fail_seconds
+        # Without data, assume a failing step burns about as long as a slow success
+        return max(self.sample_success(rng), self.sample_success(rng))
+
+    def sample(self, rng, adjust=0.0):
+        """Returns (duration, outcome): 'ok', 'failed', or 'hung' for a hung or raised attempt."""
+        if rng.random() < self.fail_rate:
+            outcome = 'hung' if rng.random() < self.retry_fraction else 'failed'
+            return max(self.sample_failure(rng) + adjust, 0.0), outcome
+        return max(self.sample_success(rng) + adjust, 0.0), 'ok'
+
+
+class LatencyModel:
+    """Per-step latency distributions, built from recorded runs or a profile file."""
+
+    def __init__(self, steps, seed=None):
+        self.steps = steps
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_history(cls, db_path=DEFAULT_DB_PATH, last=None, seed=None):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"No run history found at {db_path}")
+        conn = sqlite3.connect(db_path)
+        runs_sql, params = run_filter(last)
+        query = f"SELECT name, outcome, duration FROM steps WHERE run_id IN ({runs_sql})"
+        successes, failures = {}, {}
+        for name, outcome, duration in conn.execute(query, params):
+            (successes if outcome == 'ok' else failures).setdefault(name, []).append(duration)
+        conn.close()
+
+        steps = {}
+        for name in set(successes) | set(failures):
+            ok, failed = successes.get(name, []), failures.get(name, [])
+            steps[name] = StepLatency(samples=ok, fail_samples=failed, fail_rate=len(failed) / (len(ok) + len(failed)),
+                                      retries_recorded=True)
+        return cls(steps, seed)
+
+    @classmethod
+    def from_profile(cls, profile_path, seed=None):
+        """
+        Load a JSON profile: {"steps": {"<step name>": {"p50": s, "p95": s, "fail_rate": f,
+        "fail_seconds": s, "retry_fraction": f}}}. A step may give "samples" (list of
+        seconds) instead of p50/p95.
+        """
+        with open(profile_path, 'r') as f:
+            profile = json.load(f)
+        steps = {name: StepLatency(**spec) for name, spec in profile.get('steps', {}).items()}
+        return cls(steps, seed)
+
+    def sample_outcome(self, step_name, adjust=0.0):
+        """Sample (duration, outcome) for a step. Unknown steps take no time and succeed."""
+        step = self.steps.get(step_name)
+        if not step:
+            return 0.0, 'ok'
+        return step.sample(self.rng, adjust)
+
+    def sample(self, step_name, adjust=0.0):
+        """Sample (duration, succeeded) for a step."""
+        duration, outcome = self.sample_outcome(step_name, adjust)
+        return duration, outcome == 'ok'
+
+    def retries_recorded(self, step_name):
+        step = self.steps.get(step_name)
+        return bool(step and step.retries_recorded)
+
+
+def simulate_race(model, adjustments=None):
+    """
+    Walk the race once: refresh at go-time, then RACE_STEPS. As in
+    run_step_with_watchdog, only a hung or raised attempt at a retry_after_refresh
+    step is refreshed and retried; a plain failure ends the race. Steps sampled
+    from run history already include their retries, so they aren't retried again.
+    Returns (seconds to confirmation, succeeded, per-step seconds).
+    """
+    adjustments = adjustments or {}
+    elapsed = 0.0
+    step_times = {}
+
+    def run(name):
+        nonlocal elapsed
+        duration, outcome = model.sample_outcome(name, adjustments.get(name, 0.0))
+        elapsed += duration
+        step_times[name] = step_times.get(name, 0.0) + duration
+        return outcome
+
+    if run(REFRESH_STEP) != 'ok':
+        return elapsed, False, step_times
+    for step_name, _, retry_after_refresh in RACE_STEPS:
+        outcome = run(step_name)
+        if outcome == 'ok':
+            continue
+        if (not retry_after_refresh or outcome != 'hung' or model.retries_recorded(step_name)
+                or run(REFRESH_STEP) != 'ok' or run(step_name) != 'ok'):
+            return elapsed, False, step_times
+    return elapsed, True, step_times
+
+
+def monte_carlo(model, iterations=10000, adjustments=None):
+    """Run the race many times and summarize time-to-confirmation."""
+    if model.seed is not None:
+        # Same random draws for every scenario, so what-if comparisons are like for like
+        model.rng = random.Random(model.seed)
+    times, step_totals = [], {}
+    for _ in range(iterations):
+        elapsed, ok, step_times = simulate_race(model, adjustments)
+        if ok:
+            times.append(elapsed)
+        for name, seconds in step_times.items():
+            step_totals[name] = step_totals.get(name, 0.0) + seconds
+    return {
+        'iterations': iterations,
+        'success_rate': len(times) / iterations if iterations else 0.0,
+        'percentiles': {pct: percentile(times, pct) for pct in (50, 90, 95, 99)} if times else {},
+        'mean_step_seconds': {name: total / iterations for name, total in step_totals.items()},
+    }
+
+
+def print_summary(title, summary):
+    print(f"\n{title}")
+    print(f"  Confirmed in {summary['success_rate'] * 100:.1f}% of {summary['iterations']} simulated races")
+    for pct, value in summary['percentiles'].items():
+        print(f"  p{pct:<3} time-to-confirmation: {value:6.2f}s")
+    print("  Mean time per step:")
+    for name, seconds in sorted(summary['mean_step_seconds'].items(), key=lambda item: -item[1]):
+        print(f"    {name:<26}{seconds:6.2f}s")
+
+
+def parse_adjustments(values):
+    """Parse 'Step Name=-3.0' what-if adjustments into {step name: seconds}."""
+    adjustments = {}
+    for value in values or []:
+        name, _, delta = value.rpartition('=')
+        adjustments[name.strip()] = float(delta)
+    return adjustments
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo forecast of time from go-time to confirmed booking.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--from-history', action='store_true', help="Use step timings recorded in the run history")
+    source.add_argument('--profile', help="JSON latency profile (see latency_profile.example.json)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Path to the run history database")
+    parser.add_argument('--last', type=int, help="Only use the last N recorded runs")
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--adjust', action='append', metavar='STEP=SECONDS',
+                        help="What-if: shift a step's latency, e.g. 'Select Visit Date=-1'")
+    args = parser.parse_args()
+
+    if args.from_history:
+        latency_model = LatencyModel.from_history(args.db, last=args.last, seed=args.seed)
+    else:
+        latency_model = LatencyModel.from_profile(args.profile, seed=args.seed)
+
+    print_summary("Current flow", monte_carlo(latency_model, args.iterations))
+    if args.adjust:
+        adjustments = parse_adjustments(args.adjust)
+        print_summary(f"With {adjustments}", monte_carlo(latency_model, args.iterations, adjustments))
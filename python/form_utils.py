@@ -3,6 +3,7 @@ import aiohttp
 import json
 import time
 import os
+import re
 from datetime import datetime, timezone, timedelta
 import pytz
 from selenium import webdriver
@@ -13,6 +14,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import Select
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
+import site_selectors as sel
 
 
 # Configure logging
@@ -30,7 +32,9 @@ class FormUtilMixin:
             combined_css_selector = ", ".join(css_selectors)
             try:
                 # Wait for just ONE element that matches ANY of the selectors to be clickable
-                return wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, combined_css_selector)))
+                element = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, combined_css_selector)))
+                self.note_selector(combined_css_selector)
+                return element
             except TimeoutException:
                 logger.debug(f"Element with CSS selectors '{combined_css_selector}' not found. Trying XPath.")
 
@@ -38,7 +42,9 @@ class FormUtilMixin:
         if xpath_selectors:
             for selector in xpath_selectors:
                 try:
-                    return wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
+                    element = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
+                    self.note_selector(selector)
+                    return element
                 except TimeoutException:
                     continue # Try the next XPath selector
         
@@ -56,11 +62,7 @@ class FormUtilMixin:
                 wait = WebDriverWait(self.driver, wait_timeout)
 
                 # First Name
-                first_name_selectors = [
-                    "#firstName",                                   # HIGHEST PRIORITY: ID
-                    "input[formcontrolname='firstName']",           # SECOND PRIORITY: Angular formcontrolname
-                    "input[name*='first']", "input[placeholder*='First']" # Fallbacks
-                ]
+                first_name_selectors = sel.FIRST_NAME_SELECTORS
                 first_name_field = self._find_element_by_selectors(wait, css_selectors=first_name_selectors)
                 if first_name_field:
                     first_name_field.clear()
@@ -72,11 +74,7 @@ class FormUtilMixin:
 
 
                 # Last Name 
-                last_name_selectors = [
-                    "#lastName",                                    # HIGHEST PRIORITY: ID
-                    "input[formcontrolname='lastName']",            # SECOND PRIORITY: Angular formcontrolname
-                    "input[name*='last']", "input[placeholder*='Last']"  # Fallbacks
-                ]
+                last_name_selectors = sel.LAST_NAME_SELECTORS
                 last_name_field = self._find_element_by_selectors(wait, css_selectors=last_name_selectors)
                 if last_name_field:
                     last_name_field.clear()
@@ -87,7 +85,7 @@ class FormUtilMixin:
                     return False
 
                 # Email
-                email_selectors = ["input[type='email']", "input[name*='email']", "input[id*='email']"]
+                email_selectors = sel.EMAIL_SELECTORS
                 combined_email_selector = ", ".join(email_selectors)
                 email_fields = self.driver.find_elements(By.CSS_SELECTOR, combined_email_selector)
                 unique_email_fields = list(dict.fromkeys(email_fields)) # Remove duplicates
@@ -123,10 +121,11 @@ class FormUtilMixin:
                 # This XPath finds ALL checkboxes inside a container that has our target text, and then uses [last()] to select the very last one.
                 # This correctly identifies the terms and conditions box and ignores the text message box.
                 
-                xpath_selector = "(//input[@type='checkbox'])[last()]"
+                xpath_selector = sel.TERMS_CHECKBOX_XPATH
                 
                 logger.info(f"Attempting to find the LAST checkbox on the page with XPath: {xpath_selector}")
                 checkbox = wait.until(EC.element_to_be_clickable((By.XPATH, xpath_selector)))
+                self.note_selector(xpath_selector)
                 
                 if checkbox:
                     # We scroll the element into view before clicking to ensure it's not off-screen.
@@ -157,11 +156,17 @@ class FormUtilMixin:
                 wait_timeout = self.config.get('settings', {}).get('wait_timeout', 5)
                 wait = WebDriverWait(self.driver, wait_timeout)
 
-                xpath_selector = "//button[contains(., 'Submit')]"
+                xpath_selector = sel.SUBMIT_BUTTON_XPATH
                 
                 submit_button = wait.until(EC.element_to_be_clickable((By.XPATH, xpath_selector)))
+                self.note_selector(xpath_selector)
 
                 if submit_button:
+                    # Tag what is already on the page so confirm_booking only judges what Submit brings up
+                    self.driver.execute_script("""
+                        document.querySelectorAll(arguments[0]).forEach(el => el.setAttribute('data-before-submit', ''));
+                        arguments[1].setAttribute('data-booking-submit', '');
+                    """, ", ".join(sel.CONFIRMATION_SELECTORS + sel.ERROR_BANNER_SELECTORS), submit_button)
                     submit_button.click()
                     logger.info("Form submitted successfully!")
                     return True
@@ -172,4 +177,79 @@ class FormUtilMixin:
                 logger.error(f"Failed to submit form: {e}")
                 return False
 
-        return self.simulate_step("Submit Form", _submit)
\ No newline at end of file
+        return self.simulate_step("Submit Form", _submit)
+
+
+    def confirm_booking(self):
+        """
+        After submitting, wait for the confirmation screen or an error/sold-out banner.
+        Records the confirmation details and the time from go-time to confirmation.
+        """
+        def _confirm():
+            try:
+                logger.info("Waiting for booking confirmation...")
+                confirmation_timeout = self.config.get('settings', {}).get('confirmation_timeout', 30)
+                wait = WebDriverWait(self.driver, confirmation_timeout, poll_frequency=0.25)
+
+                # One script call per poll classifies the page as confirmed, failed or still pending.
+                # Elements tagged by submit_form were there before Submit and are ignored; page
+                # text only counts once the contact form (and its Submit button) is gone.
+                check_script = """
+                    const shown = el => !el.hasAttribute('data-before-submit') && el.offsetParent !== null && el.innerText.trim();
+                    // A confirmation wins over any banner shown alongside it
+                    const confirmation = Array.from(document.querySelectorAll(arguments[0])).find(shown);
+                    if (confirmation) {
+                        return {state: 'confirmed', text: confirmation.innerText.trim().slice(0, 500)};
+                    }
+                    const banner = Array.from(document.querySelectorAll(arguments[1])).find(shown);
+                    if (banner) {
+                        return {state: 'failed', text: banner.innerText.trim()};
+                    }
+                    const leftForm = !document.querySelector('[data-booking-submit]');
+                    if (!leftForm) {
+                        return null;
+                    }
+                    const text = document.body ? document.body.innerText : '';
+                    if (/sold out|no (more )?passes (are )?available|fully booked|no longer available/i.test(text)) {
+                        return {state: 'failed', text: text.slice(0, 300)};
+                    }
+                    if (/(booking|reservation|pass) (is |has been )?confirmed|confirmation (number|code|#)/i.test(text)) {
+                        return {state: 'confirmed', text: text.trim().slice(0, 500)};
+                    }
+                    return null;
+                """
+                confirmation_selectors = sel.CONFIRMATION_SELECTORS
+                error_banner_selectors = sel.ERROR_BANNER_SELECTORS
+
+                try:
+                    outcome = wait.until(lambda driver: driver.execute_script(
+                        check_script, ", ".join(confirmation_selectors), ", ".join(error_banner_selectors)))
+                except TimeoutException:
+                    logger.error(f"No confirmation or error appeared within {confirmation_timeout}s of submitting.")
+                    self.take_screenshot("confirmation_timeout")
+                    return False
+
+                if self.go_time is not None:
+                    self.confirmation_seconds = time.perf_counter() - self.go_time
+
+                if outcome['state'] == 'failed':
+                    logger.error(f"❌ Booking was not confirmed: {outcome['text']}")
+                    self.take_screenshot("booking_failed")
+                    return False
+
+                # Pull out the confirmation number if the page shows one
+                # (the code must contain a digit so words like "email" aren't mistaken for it)
+                match = re.search(r"confirmation\s*(?:number|code|#)?\s*[:#]?\s*([A-Z0-9-]*\d[A-Z0-9-]*)", outcome['text'], re.IGNORECASE)
+                self.confirmation = match.group(1) if match else outcome['text'][:200]
+                self.take_screenshot("booking_confirmed")
+
+                if self.confirmation_seconds is not None:
+                    logger.info(f"🎉 Booking CONFIRMED {self.confirmation_seconds:.2f}s after go-time. Confirmation: {self.confirmation}")
+                else:
+                    logger.info(f"🎉 Booking CONFIRMED. Confirmation: {self.confirmation}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to check booking confirmation: {e}")
+                return False
+
+        return self.simulate_step("Confirm Booking", _confirm)
@@ -1,9 +1,16 @@
 import asyncio
+import email.utils
+import functools
+import queue
+import statistics
 import json
 import time
 import os
 import sys
 import shutil
+import socket
+import subprocess
+import urllib.request
 from datetime import datetime, timezone, timedelta
 import pytz
 from selenium import webdriver
@@ -11,21 +18,31 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 import logging
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
 import random
 import undetected_chromedriver as uc
 from selenium.webdriver.common.action_chains import ActionChains
 from datetime import timedelta
 from date_utils import DateUtilMixin
 from form_utils import FormUtilMixin
+from preflight import PreflightMixin
+from dom_recorder import DomRecorder
+from run_history import RunHistory
+from flow_simulator import RACE_STEPS, LatencyModel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Starting this long after the release time still races today instead of waiting for tomorrow
+RELEASE_LATE_START_SECONDS = 600
 
-class AdvancedTicketBot(DateUtilMixin, FormUtilMixin):
+
+class AdvancedTicketBot(DateUtilMixin, FormUtilMixin, PreflightMixin):
     def __init__(self, config):
         self.config = config
         self.driver = None
@@ -37,6 +54,37 @@ class AdvancedTicketBot(DateUtilMixin, FormUtilMixin):
         self.selected_park = config.get('selected_park', 'joffre_lakes')
         self.parks = config.get('parks', {})
         self.cloudflare_bypass_enabled = config.get('settings', {}).get('cloudflare_bypass', True)
+        self.attach_to_browser = config.get('settings', {}).get('attach_to_browser', False)
+        self.debugger_port = config.get('settings', {}).get('debugger_port', 9222)
+        self.browser_attached = False
+
+        # All Selenium work runs on one dedicated thread so the event loop stays free
+        self.driver_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='driver')
+        # Screenshot files are written in the background
+        self.writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='writer')
+        self.clock_offset = 0.0  # seconds the booking server's clock is ahead of ours
+        self.step_budget_seconds = config.get('settings', {}).get('step_budget_seconds', 30)
+        self.step_budgets = dict(config.get('settings', {}).get('step_budgets', {}))
+        # Confirm Booking waits up to confirmation_timeout by design, so its budget has to be longer
+        self.step_budgets.setdefault('Confirm Booking', config.get('settings', {}).get('confirmation_timeout', 30) + 10)
+        # How long a step past its budget gets to fail on the page load timeout before it is abandoned
+        self.hung_step_grace_seconds = config.get('settings', {}).get('hung_step_grace_seconds', 5)
+        self.driver_wedged = False  # a hung step still holds the driver thread
+        self.page_load_timeout = None  # last value set on the driver
+
+        # Run history (see run_history.py for the report command)
+        self.run_history = None
+        self.step_selector = None
+        self.failed_step = None
+        self.release_timer_error = None
+        self.go_time = None
+        self.race_seconds = None
+        self.confirmation = None
+        self.confirmation_seconds = None  # go-time to confirmed booking, the headline metric
+        self.latency_model = None  # loaded on first simulated step
+        self.preflight_results = []
+        self.dom_recorder = None
+        self.step_timings = []  # (step name, outcome, seconds) for this run
 
     def ensure_cf_clearance_folder(self):
         """Ensure cf-clearance folder exists in the script directory."""
@@ -57,13 +105,159 @@ class AdvancedTicketBot(DateUtilMixin, FormUtilMixin):
 
     def setup_driver(self):
         """Setup the driver, defaulting to the stealth version."""
+        if self.attach_to_browser:
+            logger.info(f"Attempting to attach to a running browser on debugging port {self.debugger_port}.")
+            return self.setup_attached_driver()
         if self.cloudflare_bypass_enabled:
             logger.info("Attempting to set up stealth (undetected-chromedriver) driver.")
-            return self.setup_stealth_driver()
+            started = time.perf_counter()
+            if not self.setup_stealth_driver():
+                return False
+            self.save_cold_launch_time(time.perf_counter() - started)
+            return True
         else:
             logger.error("Standard driver is not supported for this script. Aborting.")
             return False
 
+    def startup_stats_path(self):
+        """Location of the saved browser startup timings (kept inside the profile folder)."""
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(script_dir, "cf-clearance", "startup_stats.json")
+
+    def save_cold_launch_time(self, seconds):
+        """Remember how long the last cold browser launch took."""
+        try:
+            with open(self.startup_stats_path(), 'w') as f:
+                json.dump({'cold_launch_seconds': round(seconds, 3)}, f)
+            logger.info(f"Cold browser launch took {seconds:.2f}s.")
+        except Exception as e:
+            logger.debug(f"Could not save startup stats: {e}")
+
+    def load_cold_launch_time(self):
+        """Return the last recorded cold launch time in seconds, or None."""
+        try:
+            with open(self.startup_stats_path(), 'r') as f:
+                return json.load(f).get('cold_launch_seconds')
+        except Exception:
+            return None
+
+    def is_debugger_reachable(self):
+        """Check whether something is listening on the local debugging port."""
+        try:
+            with socket.create_connection(('127.0.0.1', self.debugger_port), timeout=0.5):
+                return True
+        except OSError:
+            return False
+
+    def devtools_browser(self):
+        """
+        Ask the debugging port for /json/version. Returns the browser version string
+        (e.g. 'Chrome/120.0.6099.109') if a Chrome DevTools endpoint answers, else None.
+        """
+        try:
+            url = f"http://127.0.0.1:{self.debugger_port}/json/version"
+            with urllib.request.urlopen(url, timeout=1) as response:
+                info = json.load(response)
+        except Exception:
+            return None
+        if isinstance(info, dict) and info.get('webSocketDebuggerUrl') and 'Chrom' in info.get('Browser', ''):
+            return info['Browser']
+        return None
+
+    def launch_debuggable_browser(self, profile_path):
+        """
+        Start Chrome on the debugging port with the cf-clearance profile.
+        The process is detached so it keeps running after this run ends.
+        """
+        chrome_path = uc.find_chrome_executable()
+        if not chrome_path:
+            logger.error("Could not find a Chrome executable to launch.")
+            return False
+
+        args = [
+            chrome_path,
+            f"--remote-debugging-port={self.debugger_port}",
+            f"--user-data-dir={profile_path}",
+            '--profile-directory=Default',
+            '--disable-blink-features=AutomationControlled',
+            '--start-maximized',
+            '--no-first-run',
+            '--no-default-browser-check',
+        ]
+        popen_kwargs = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL, 'stdin': subprocess.DEVNULL}
+        if os.name == 'nt':
+            popen_kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_kwargs['start_new_session'] = True
+        subprocess.Popen(args, **popen_kwargs)
+
+        # Wait for the DevTools endpoint to come up
+        deadline = time.time() + 20
+        while time.time() < deadline:
+            if self.devtools_browser():
+                logger.info(f"✅ Launched Chrome on debugging port {self.debugger_port}. It will stay open after this run.")
+                return True
+            time.sleep(0.2)
+
+        logger.error(f"Chrome did not open debugging port {self.debugger_port} in time.")
+        return False
+
+    def setup_attached_driver(self):
+        """
+        Attach to a Chrome already running on the debugging port with the cf-clearance
+        profile. If none is reachable, start one and leave it running after the flow ends.
+        """
+        try:
+            started = time.perf_counter()
+            cold_start = False
+
+            if not self.is_debugger_reachable():
+                logger.info("No browser found on the debugging port. Starting one...")
+                profile_path = self.ensure_cf_clearance_folder()
+                if not profile_path:
+                    logger.error("Failed to create/access cf-clearance folder")
+                    return False
+                if not self.launch_debuggable_browser(profile_path):
+                    return False
+                cold_start = True
+
+            # Anything could be listening on the port; only attach to a Chrome DevTools endpoint
+            browser = self.devtools_browser()
+            if not browser:
+                logger.error(f"Port {self.debugger_port} is in use, but it is not a Chrome DevTools endpoint "
+                             f"(/json/version did not answer as Chrome). Not attaching to it.")
+                logger.error("Free the port, set a different 'debugger_port', or disable 'attach_to_browser'.")
+                return False
+            logger.info(f"Found {browser} on debugging port {self.debugger_port}.")
+
+            options = Options()
+            options.debugger_address = f"127.0.0.1:{self.debugger_port}"
+
+            # Reuse undetected-chromedriver's patched chromedriver binary
+            patcher = uc.Patcher()
+            patcher.auto()
+            self.driver = webdriver.Chrome(service=Service(patcher.executable_path), options=options)
+            self.browser_attached = True
+
+            wait_timeout = self.config.get('settings', {}).get('wait_timeout', 15)
+            self.driver.implicitly_wait(wait_timeout)
+
+            elapsed = time.perf_counter() - started
+            if cold_start:
+                self.save_cold_launch_time(elapsed)
+            else:
+                cold_launch = self.load_cold_launch_time()
+                if cold_launch:
+                    logger.info(f"✅ Attached to running browser in {elapsed:.2f}s, saving ~{cold_launch - elapsed:.2f}s vs the last cold launch ({cold_launch:.2f}s).")
+                else:
+                    logger.info(f"✅ Attached to running browser in {elapsed:.2f}s (no cold launch recorded yet to compare).")
+            return True
+
+        except Exception as e:
+            logger.error(f"CRITICAL: Could not attach to browser on port {self.debugger_port}. Error: {e}", exc_info=True)
+            logger.error("Make sure the Chrome on that port was started with the cf-clearance profile, or disable 'attach_to_browser'.")
+            return False
+
     def setup_stealth_driver(self):
         """Setup with undetected-chromedriver and a persistent user profile."""
         try:
@@ -99,71 +293,320 @@ class AdvancedTicketBot(DateUtilMixin, FormUtilMixin):
     def calculate_target_date(self):
         """Calculate the date based on config."""
         today = datetime.now()
-        days_ahead = self.config.get('settings', {}).get('days_ahead', 2)
+        # First preference; select_visit_date may fall back to a later one
+        days_ahead = self.preference_list('days_ahead_preferences', 'days_ahead', 2)[0]
         self.target_date = today + timedelta(days=days_ahead)
         logger.info(f"Target visit date: {self.target_date.strftime('%Y-%m-%d')}")
 
     def take_screenshot(self, step_name):
-        """Take screenshot if enabled in test settings."""
+        """Take screenshot if enabled in test settings. The file is written in the background."""
         if self.test_settings.get('screenshot_steps', False):
             try:
                 self.screenshot_counter += 1
                 screenshots_dir = os.path.join(os.path.dirname(__file__), "..", "screenshots")
-                os.makedirs(screenshots_dir, exist_ok=True)
                 filename = os.path.join(screenshots_dir, f"screenshot_{self.screenshot_counter:02d}_{step_name}.png")
-                self.driver.save_screenshot(filename)
-                logger.info(f"Screenshot saved: {filename}")
+                png = self.driver.get_screenshot_as_png()
+                self.writer_executor.submit(self.write_screenshot, filename, png)
             except Exception as e:
                 logger.warning(f"Failed to take screenshot: {e}")
 
+    def write_screenshot(self, filename, png):
+        """Write screenshot bytes to disk (runs on the writer thread)."""
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, 'wb') as f:
+                f.write(png)
+            logger.info(f"Screenshot saved: {filename}")
+        except Exception as e:
+            logger.warning(f"Failed to write screenshot: {e}")
+
     def wait_for_user_input(self, step_name):
         """Wait for user input if step-by-step mode is enabled."""
         if self.test_settings.get('step_by_step', False):
             input(f"Press Enter to continue after '{step_name}' step...")
 
     def simulate_step(self, step_name, actual_function):
-        """Simulate a step if simulate_steps is enabled, otherwise execute normally"""
+        """
+        Simulate a step if simulate_steps is enabled, otherwise execute normally.
+        With a latency_profile (or latency_from_history) in the test settings, the
+        simulated step takes a sampled time and can fail; otherwise it takes 1 second.
+        """
         if self.test_settings.get('simulate_steps', False):
+            latency_model = self.get_latency_model()
+            if latency_model:
+                duration, succeeded = latency_model.sample(step_name)
+                logger.info(f"SIMULATING: {step_name} ({duration:.2f}s, {'ok' if succeeded else 'fails'})")
+                time.sleep(duration)
+                return succeeded
             logger.info(f"SIMULATING: {step_name}")
             time.sleep(1)
             return True
         else:
             return actual_function()
 
+    def get_latency_model(self):
+        """Load the simulation latency model once, if one is configured."""
+        if self.latency_model is None:
+            try:
+                profile_path = self.test_settings.get('latency_profile')
+                if profile_path:
+                    if not os.path.isabs(profile_path):
+                        profile_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), profile_path)
+                    self.latency_model = LatencyModel.from_profile(profile_path)
+                elif self.test_settings.get('latency_from_history', False):
+                    self.latency_model = LatencyModel.from_history()
+                else:
+                    self.latency_model = False
+            except Exception as e:
+                logger.warning(f"Could not load latency model, using flat 1s steps: {e}")
+                self.latency_model = False
+        return self.latency_model
+
+    async def run_in_driver(self, func, *args):
+        """Run a blocking driver call on the dedicated driver thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.driver_executor, functools.partial(func, *args))
+
+    def run_with_page_load_timeout(self, budget, step_function):
+        """
+        Run a step on the driver thread with the page load timeout set to its budget.
+        Chromedriver runs one command per session at a time, so a stuck get/refresh
+        can't be stopped from outside; the timeout makes it raise instead.
+        """
+        if self.page_load_timeout != budget:
+            self.driver.set_page_load_timeout(budget)
+            self.page_load_timeout = budget
+        return step_function()
+
+    async def wait_out_hung_step(self, step_name, future):
+        """
+        Give a step that ran past its budget a short grace period to fail on the page
+        load timeout. Returns (finished, result); if it is still running, the step is
+        abandoned and the driver thread is treated as wedged.
+        """
+        try:
+            return True, await asyncio.wait_for(asyncio.shield(future), self.hung_step_grace_seconds)
+        except asyncio.TimeoutError:
+            self.driver_wedged = True
+            # Nobody awaits the abandoned step, so swallow whatever it ends with
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            logger.error(f"⏱️ Watchdog: '{step_name}' is still blocking the driver after a "
+                         f"{self.hung_step_grace_seconds}s grace period. Giving up on it.")
+            return False, False
+
+    async def recover_driver(self, step_name, hung_future):
+        """
+        Attach mode only: the browser outlives chromedriver, so stop chromedriver (which
+        fails the hung command and frees the driver thread) and attach a fresh one.
+        Returns True if the driver is usable again. With a launched browser there is
+        nothing to re-attach to, so the race just ends.
+        """
+        if not self.browser_attached:
+            return False
+        logger.warning(f"Watchdog: restarting chromedriver and re-attaching to the browser to recover from '{step_name}'...")
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.driver.service.stop)
+            await asyncio.wait_for(asyncio.shield(hung_future), self.hung_step_grace_seconds)
+        except asyncio.TimeoutError:
+            logger.error("Watchdog: the driver thread is still stuck after stopping chromedriver.")
+            return False
+        except Exception:
+            pass  # the hung command failing is what frees the driver thread
+        self.driver_wedged = False
+        self.page_load_timeout = None
+        if not await self.run_in_driver(self.setup_attached_driver):
+            logger.error("Watchdog: could not re-attach to the browser.")
+            return False
+        logger.info("Watchdog: re-attached to the browser.")
+        return True
+
+    def note_selector(self, selector):
+        """Remember which selector located the element for the current step."""
+        self.step_selector = selector
+
+    def record_dom(self, step_name, phase):
+        """Snapshot the DOM for the recorder; hashing and compression happen on the writer thread."""
+        try:
+            snapshot = self.dom_recorder.capture(self.driver)
+            self.writer_executor.submit(self.dom_recorder.save, snapshot, step_name, phase)
+        except Exception as e:
+            logger.debug(f"DOM snapshot at {phase} of '{step_name}' failed: {e}")
+
+    async def run_step(self, step_name, step_function, retry_after_refresh=False):
+        """
+        Run a flow step on the driver thread under a watchdog. A step past its budget
+        gets a short grace period to fail on the page load timeout and is then given
+        up on; in attach mode chromedriver is restarted and re-attached. Steps marked
+        retry_after_refresh are retried once after a refresh if they hung or raised.
+        The step's duration, outcome and winning selector go to the run history.
+        DOM snapshots, if enabled, are taken outside the timed part of the step.
+        """
+        if self.dom_recorder and not self.driver_wedged:
+            await self.run_in_driver(self.record_dom, step_name, 'entry')
+        self.step_selector = None
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result, outcome = await self.run_step_with_watchdog(step_name, step_function, retry_after_refresh)
+            return result
+        finally:
+            if outcome != 'ok':
+                self.failed_step = step_name
+            duration = time.perf_counter() - started
+            self.step_timings.append((step_name, outcome, duration))
+            if self.run_history:
+                self.run_history.record_step(step_name, outcome, duration, self.step_selector)
+            # A snapshot would queue behind a step the watchdog gave up on, so skip it then
+            if self.dom_recorder and not self.driver_wedged:
+                await self.run_in_driver(self.record_dom, step_name, 'exit')
+
+    async def run_step_with_watchdog(self, step_name, step_function, retry_after_refresh):
+        """Returns (result, outcome) where outcome is 'ok', 'failed' or 'hung'."""
+        budget = self.step_budgets.get(step_name, self.step_budget_seconds)
+        future = asyncio.ensure_future(self.run_in_driver(self.run_with_page_load_timeout, budget, step_function))
+        hung = False
+        try:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), budget)
+            except asyncio.TimeoutError:
+                hung = True
+                logger.error(f"⏱️ Watchdog: '{step_name}' is still running after its {budget}s budget.")
+                finished, result = await self.wait_out_hung_step(step_name, future)
+                if not finished:
+                    # The driver thread is still busy; a refresh and retry need a fresh chromedriver first
+                    if not await self.recover_driver(step_name, future) or not retry_after_refresh:
+                        return False, 'hung'
+                    result = None
+        except Exception as e:
+            if not retry_after_refresh:
+                raise
+            logger.warning(f"First attempt at {step_name} failed: {e}")
+            result = None
+
+        if result or not retry_after_refresh or (result is False and not hung):
+            return result, ('ok' if result else ('hung' if hung else 'failed'))
+
+        logger.info(f"Refreshing site and retrying {step_name}...")
+        for attempt in (self.refresh_site, step_function):
+            future = asyncio.ensure_future(self.run_in_driver(self.run_with_page_load_timeout, budget, attempt))
+            try:
+                try:
+                    result = await asyncio.wait_for(asyncio.shield(future), budget)
+                except asyncio.TimeoutError:
+                    logger.error(f"⏱️ Watchdog: retry of '{step_name}' is still running after its {budget}s budget.")
+                    finished, result = await self.wait_out_hung_step(step_name, future)
+                    if not finished:
+                        # Free the driver for cleanup, but don't retry a second time
+                        await self.recover_driver(step_name, future)
+                        return False, 'hung'
+            except Exception as retry_e:
+                logger.error(f"{step_name} failed on retry: {retry_e}")
+                return False, 'failed'
+            if not result:
+                return False, 'failed'
+        logger.info(f"{step_name} succeeded on retry after refresh.")
+        return result, 'ok'
+
+    def read_server_date(self):
+        """
+        HEAD the current page from inside the browser, so the request carries the
+        session's cookies and cf-clearance like any other page request.
+        Returns {date, sent, received} with the local send/receive times in ms.
+        """
+        return self.driver.execute_async_script("""
+            const done = arguments[arguments.length - 1];
+            const sent = Date.now();
+            fetch(location.href, {method: 'HEAD', cache: 'no-store', credentials: 'same-origin'})
+                .then(response => done({date: response.headers.get('Date'), sent: sent, received: Date.now()}))
+                .catch(error => done({error: String(error)}));
+        """)
+
+    async def probe_clock_skew(self, samples=3):
+        """
+        Estimate how far the booking server's clock is from ours using the HTTP
+        Date header, so the release timer fires on the server's 7 AM. Runs once the
+        browser is on the site, through the browser session.
+        """
+        offsets = []
+        for _ in range(samples):
+            try:
+                response = await self.run_in_driver(self.read_server_date)
+                if response.get('date'):
+                    server_time = email.utils.parsedate_to_datetime(response['date']).timestamp()
+                    # The header is truncated to the second, so add half a second
+                    offsets.append(server_time + 0.5 - (response['sent'] + response['received']) / 2000)
+                elif response.get('error'):
+                    logger.debug(f"Clock skew probe failed: {response['error']}")
+            except Exception as e:
+                logger.debug(f"Clock skew probe failed: {e}")
+            await asyncio.sleep(0.5)
+
+        if not offsets:
+            logger.warning("Could not measure server clock skew. Using the local clock.")
+            return
+
+        offset = statistics.median(offsets)
+        # The Date header only has one-second resolution, so ignore smaller offsets
+        if abs(offset) >= 1.0:
+            self.clock_offset = offset
+            logger.info(f"Server clock is {offset:+.1f}s from the local clock. Adjusting the release timer.")
+        else:
+            logger.info(f"Server clock is within a second of the local clock ({offset:+.1f}s).")
+
+    def server_now(self):
+        """Current Vancouver time on the booking server's clock."""
+        return datetime.now(pytz.timezone('America/Vancouver')) + timedelta(seconds=self.clock_offset)
+
+    def release_target(self):
+        """
+        The release time to wait for. A release that passed less than
+        RELEASE_LATE_START_SECONDS ago still counts (the timer fires at once),
+        e.g. when warm-up ran long; an older one rolls over to tomorrow.
+        """
+        release_time_str = self.config.get('settings', {}).get('vancouver_release_time', '07:00')
+        hour, minute = map(int, release_time_str.split(':'))
+        now_vancouver = self.server_now()
+        target_time = now_vancouver.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if (now_vancouver - target_time).total_seconds() > RELEASE_LATE_START_SECONDS:
+            target_time += timedelta(days=1)
+        return target_time
+
+    def seconds_until_release(self):
+        """Seconds left before release (negative if just passed), or None when not waiting for it."""
+        if self.skip_time_wait:
+            return None
+        return (self.release_target() - self.server_now()).total_seconds()
+
     async def wait_for_release_time(self):
             """Wait until the configured release time in Vancouver time zone."""
             if self.skip_time_wait:
                 logger.info("SKIPPING time wait due to test mode settings.")
                 return True
-                
-            vancouver_tz = pytz.timezone('America/Vancouver')
+
             release_time_str = self.config.get('settings', {}).get('vancouver_release_time', '07:00')
-            hour, minute = map(int, release_time_str.split(':'))
-            
+            target_time = self.release_target()
+            if target_time <= self.server_now():
+                logger.warning(f"Release time {release_time_str} has already passed. Starting immediately.")
+
             while True:
-                now_vancouver = datetime.now(vancouver_tz)
-                target_time = now_vancouver.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                
-                # If the target time has already passed today, set it for tomorrow
-                if now_vancouver >= target_time:
-                    target_time += timedelta(days=1)
-                
-                time_diff = (target_time - now_vancouver).total_seconds()
-                
+                time_diff = (target_time - self.server_now()).total_seconds()
+
+                # Check if we've reached the target time
+                if time_diff <= 0:
+                    # How late the timer fired relative to the (server-corrected) release time
+                    self.release_timer_error = -time_diff
+                    logger.info(f"It's now {release_time_str} Vancouver time. Proceeding.")
+                    return True
+
                 if time_diff <= 10:
                     logger.info(f"Getting ready... {time_diff:.1f} seconds remaining.")
-                    await asyncio.sleep(0.1)
+                    await asyncio.sleep(min(0.1, time_diff))
                 elif time_diff <= 60:
                     logger.info(f"Almost time... {time_diff:.0f} seconds remaining.")
                     await asyncio.sleep(1)
                 else:
                     logger.info(f"Waiting for release. {time_diff:.0f} seconds remaining.")
-                    await asyncio.sleep(30)
-                
-                # Check if we've reached the target time
-                if datetime.now(vancouver_tz) >= target_time:
-                    logger.info(f"It's now {release_time_str} Vancouver time. Proceeding.")
-                    return True
+                    await asyncio.sleep(min(30, time_diff - 60))
 
     def refresh_site(self):
         """Refreshes the current page."""
@@ -176,83 +619,130 @@ class AdvancedTicketBot(DateUtilMixin, FormUtilMixin):
             logger.error(f"Failed to refresh site: {e}")
             return False
 
+    async def run_race(self):
+            """
+            The race from go-time to confirmed booking: refresh, then every step in
+            RACE_STEPS. Also used by benchmark.py against the offline stand-in site.
+            """
+            self.go_time = time.perf_counter()
+        
+            logger.info("--- GO-TIME! Refreshing and beginning high-speed selection! ---")
+            if not await self.run_step("Refresh Site", self.refresh_site): return False
+            await self.run_in_driver(self.wait_for_user_input, "Page refreshed, now racing at max speed")
+        
+            # The step chain lives in flow_simulator.RACE_STEPS so simulations match it.
+            # Select Visit Date is retried once after a refresh if it errors out or hangs.
+            for step_name, method_name, retry_after_refresh in RACE_STEPS:
+                if not await self.run_step(step_name, getattr(self, method_name), retry_after_refresh):
+                    return False
+
+            self.race_seconds = time.perf_counter() - self.go_time
+            return True
+
     async def run_complete_flow(self):
             """
             Executes the booking flow by warming up the session, then
             racing through the selections after the 7 AM refresh.
+            Driver work runs on the driver thread; the event loop keeps the
+            release timer, clock-skew probes and step watchdog running.
             """
+            result = 'error'
             try:
                 self.calculate_target_date()
-                if not self.setup_driver():
+                if self.config.get('settings', {}).get('record_run_history', True):
+                    try:
+                        self.run_history = RunHistory()
+                        self.run_history.start_run(self.config, self.target_date)
+                    except Exception as e:
+                        logger.warning(f"Run history disabled: {e}")
+                        self.run_history = None
+                if self.config.get('settings', {}).get('record_dom_snapshots', False):
+                    self.dom_recorder = DomRecorder()
+                    logger.info(f"Recording DOM snapshots to {self.dom_recorder.run_dir}")
+
+                if not await self.run_in_driver(self.setup_driver):
                     logger.error("Driver setup failed. Aborting flow.")
+                    self.failed_step = "Driver Setup"
                     return False
 
                 # --- PRE-7 AM: SESSION WARM-UP (Build Trust) ---
                 logger.info("--- Starting Session WARM-UP Phase ---")
             
                 logger.info(f"Navigating to: {self.config['ticket_url']} to build a clean session.")
-                self.driver.get(self.config['ticket_url'])
+                await self.run_in_driver(self.driver.get, self.config['ticket_url'])
             
                 logger.info("Session started. Simulating human presence before release time...")
-                time.sleep(random.uniform(5, 12))
+                await asyncio.sleep(random.uniform(5, 12))
+
+                if self.config.get('settings', {}).get('sync_clock_to_server', True) and not self.skip_time_wait:
+                    await self.probe_clock_skew()
+
+                if self.config.get('settings', {}).get('preflight_check', True):
+                    # The walk can take a minute or more; never let it run into release time
+                    seconds_left = self.seconds_until_release()
+                    preflight_lead = self.config.get('settings', {}).get('preflight_min_lead_seconds', 120)
+                    if seconds_left is not None and seconds_left < preflight_lead:
+                        logger.warning(f"Skipping the pre-flight check: release is only {seconds_left:.0f}s away "
+                                       f"(it needs {preflight_lead}s).")
+                    else:
+                        logger.info("Running pre-flight selector health check...")
+                        await self.run_in_driver(self.run_preflight_check)
+                        # Back to the landing page, where the race starts
+                        await self.run_in_driver(self.driver.get, self.config['ticket_url'])
+                        await asyncio.sleep(random.uniform(2, 4))
             
                 for _ in range(random.randint(1, 3)):
-                    self.driver.execute_script(f"window.scrollBy(0, {random.randint(50, 200)});")
-                    time.sleep(random.uniform(0.6, 1.5))
+                    await self.run_in_driver(self.driver.execute_script, f"window.scrollBy(0, {random.randint(50, 200)});")
+                    await asyncio.sleep(random.uniform(0.6, 1.5))
 
                 logger.info("--- WARM-UP Complete. Waiting for release time. ---")
             
                 # --- AT 7 AM: THE RACE (Maximum Speed) ---
                 await self.wait_for_release_time()
+                if not await self.run_race(): return False
             
-                logger.info("--- GO-TIME! Refreshing and beginning high-speed selection! ---")
-                if not self.refresh_site(): return False
-                self.wait_for_user_input("Page refreshed, now racing at max speed")
-            
-                if not self.select_park_and_book(): return False
-                
-                # Try select_visit_date with retry mechanism
-                try:
-                    if not self.select_visit_date(): return False
-                except Exception as e:
-                    logger.warning(f"First attempt at select_visit_date failed: {e}")
-                    logger.info("Refreshing site and retrying select_visit_date...")
-                    
-                    if not self.refresh_site(): return False
-                    logger.info("Site refreshed successfully. Retrying select_visit_date...")
-                    
-                    try:
-                        if not self.select_visit_date(): return False
-                        logger.info("select_visit_date succeeded on retry after refresh.")
-                    except Exception as retry_e:
-                        logger.error(f"select_visit_date failed on retry: {retry_e}")
-                        return False
-                
-                if not self.select_pass_type(): return False
-                if not self.select_visit_time(): return False
-                if not self.click_next_button(): return False
-                if not self.fill_form_details(): return False
-                if not self.accept_terms_and_conditions(): return False
-                if not self.submit_form(): return False
-            
-                logger.info("✅ Complete booking flow executed successfully!")
+                result = 'success'
+                logger.info(f"✅ Complete booking flow executed successfully! Confirmed {self.confirmation_seconds or self.race_seconds:.2f}s after go-time.")
                 keep_open_time = self.config.get('settings', {}).get('keep_browser_open_seconds', 15)
                 logger.info(f"Process finished. Browser will remain open for {keep_open_time} seconds.")
-                time.sleep(keep_open_time)
+                await asyncio.sleep(keep_open_time)
                 return True
             
             except Exception as e:
                 logger.error(f"Complete flow failed with an unexpected error: {e}", exc_info=True)
-                self.take_screenshot("flow_failure")
+                await self.run_in_driver(self.take_screenshot, "flow_failure")
                 return False
         
             finally:
+                if self.run_history:
+                    if result != 'success' and self.failed_step:
+                        result = 'failed'
+                    if self.race_seconds is None and self.go_time:
+                        self.race_seconds = time.perf_counter() - self.go_time
+                    # total_seconds is measured from go-time, not from launch
+                    self.run_history.finish_run(result, self.failed_step, self.release_timer_error,
+                                                self.race_seconds, self.confirmation_seconds, self.confirmation)
+                    self.run_history.close()
                 if self.driver:
+                    if self.driver_wedged:
+                        # Stopping chromedriver makes the abandoned command fail and frees the driver thread
+                        logger.warning("A hung step still holds the driver. Stopping chromedriver to release it.")
+                        try:
+                            await asyncio.get_running_loop().run_in_executor(None, self.driver.service.stop)
+                        except Exception as e:
+                            logger.warning(f"Could not stop chromedriver: {e}")
                     if self.test_mode or 'pydevd' in sys.modules:
                         logger.info("Debug/Test mode active. Keeping browser open for 60 seconds.")
-                        time.sleep(60)
-                    self.driver.quit()
-                    logger.info("Browser has been closed.")
+                        await asyncio.sleep(60)
+                    if self.browser_attached:
+                        # Only stop chromedriver; the browser stays up for the next run
+                        await self.run_in_driver(self.driver.service.stop)
+                        logger.info(f"Detached from browser. It is still running on port {self.debugger_port}.")
+                    else:
+                        await self.run_in_driver(self.driver.quit)
+                        logger.info("Browser has been closed.")
+                self.driver_executor.shutdown(wait=False)
+                self.writer_executor.shutdown(wait=True)
 
 # --- CONFIGURATION LOADER ---
 def load_config():
@@ -274,6 +764,15 @@ def load_config():
         logger.error(f"Failed to load configuration: {e}")
         return None
 
+def start_background_logging():
+    """Hand log records to a listener thread so console writes don't block the flow."""
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
 # --- MAIN EXECUTION ---
 async def main():
     """Main function to initialize and run the bot."""
@@ -292,7 +791,10 @@ async def main():
     await bot.run_complete_flow()
 
 if __name__ == "__main__":
+    log_listener = start_background_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("\nBot stopped by user.")
\ No newline at end of file
+        logger.info("\nBot stopped by user.")
+    finally:
+        log_listener.stop()
\ No newline at end of file
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.parse import urlencode
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STANDIN_SITE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "standin_site")
+
+
+def standin_url(**params):
+    """
+    file:// URL of the offline stand-in site. Keyword arguments become its query
+    parameters, e.g. standin_url(soldout='AM', delay=250) (see standin_site/index.html).
+    """
+    url = Path(STANDIN_SITE_DIR, "index.html").as_uri()
+    query = {key: ",".join(map(str, value)) if isinstance(value, (list, tuple)) else value
+             for key, value in params.items() if value is not None}
+    return f"{url}?{urlencode(query)}" if query else url
+
+
+def create_offline_driver(headless=True):
+    """
+    Plain Chrome with a throwaway profile for offline pages. No stealth and no
+    cf-clearance profile: it never talks to the real site.
+    """
+    profile_dir = tempfile.mkdtemp(prefix="bcparks-offline-")
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-first-run")
+    options.add_argument("--no-default-browser-check")
+    options.add_argument("--disable-extensions")
+    # Needed in containers and CI runners
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+    driver.offline_profile_dir = profile_dir
+    return driver
+
+
+def quit_offline_driver(driver):
+    """Quit a driver from create_offline_driver and delete its temporary profile."""
+    try:
+        driver.quit()
+    finally:
+        profile_dir = getattr(driver, 'offline_profile_dir', None)
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
@@ -0,0 +1,345 @@
+import argparse
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+import logging
+import site_selectors as sel
+from dom_recorder import load_fixture_index, replay_fixture
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def selector_by(selector):
+    """XPath for selectors starting with '//' or '(', CSS otherwise."""
+    return By.XPATH if selector.startswith(('//', '(')) else By.CSS_SELECTOR
+
+
+class PreflightMixin:
+    """
+    Selector health check. Walks the pages reachable without booking and evaluates
+    every selector list from site_selectors, so breakage is found during warm-up
+    instead of mid-race. Nothing is ever submitted.
+    """
+
+    def check_selectors(self, page, step_name, label, selectors, critical=False):
+        """Evaluate a selector list in fallback order without waiting; the first match wins."""
+        results = []
+        winner = None
+        ms_to_winner = None
+        for selector in selectors:
+            started = time.perf_counter()
+            try:
+                matches = len(self.driver.find_elements(selector_by(selector), selector))
+                error = None
+            except Exception as e:
+                matches, error = 0, str(e).splitlines()[0]
+            results.append({
+                'selector': selector,
+                'matches': matches,
+                'ms': (time.perf_counter() - started) * 1000,
+                'error': error,
+            })
+            if matches and winner is None:
+                winner = selector
+                # What the fallback walk costs before it reaches the winner
+                ms_to_winner = sum(result['ms'] for result in results)
+
+        check = {'page': page, 'step': step_name, 'label': label, 'critical': critical,
+                 'reachable': True, 'winner': winner, 'ms_to_winner': ms_to_winner, 'selectors': results}
+        self.preflight_results.append(check)
+        return check
+
+    def mark_unreachable(self, page, checks):
+        """Record checks for a page the walk could not reach."""
+        for step_name, label, selectors, critical in checks:
+            self.preflight_results.append({
+                'page': page, 'step': step_name, 'label': label, 'critical': critical,
+                'reachable': False, 'winner': None,
+                'selectors': [{'selector': s, 'matches': 0, 'ms': 0.0, 'error': None} for s in selectors],
+            })
+
+    def run_checks(self, page, checks):
+        return [self.check_selectors(page, *check) for check in checks]
+
+    def preflight_check_lists(self, day):
+        """
+        Every selector list the flow uses, grouped by the page it lives on.
+        Each check is (step name, label, selectors, critical). day fills in the day-cell selectors.
+        """
+        park_info = self.parks.get(self.selected_park, {})
+        search_text = park_info.get('search_text', park_info.get('name', self.selected_park))
+        preferred_slots = [slot for slot in self.preferred_time_slots() if slot in self.VALID_TIME_SLOTS]
+        return {
+            'landing': [
+                ("Select Park and Book", "Book a Pass button",
+                 [sel.PARK_BOOK_BUTTON_XPATH.format(search_text=search_text.lower())], True),
+            ],
+            'booking': [
+                ("Select Visit Date", "Visit Date label", [sel.VISIT_DATE_LABEL_XPATH], True),
+                ("Select Visit Date", "calendar button", [sel.VISIT_DATE_BUTTON_XPATH], True),
+                ("Select Visit Date", "date input", sel.DATE_INPUT_XPATHS, False),
+                ("Complete Booking Form", "pass type dropdown", sel.PASS_TYPE_SELECTORS, True),
+                ("Complete Booking Form", "Next button", sel.NEXT_BUTTON_SELECTORS, True),
+            ],
+            'calendar': [
+                ("Select Visit Date", "date table", sel.DATE_TABLE_SELECTORS, True),
+                ("Select Visit Date", "day cell",
+                 [selector.format(target_day=day) for selector in sel.DAY_XPATH_SELECTORS], True),
+                ("Select Visit Date", "next month button", sel.NEXT_MONTH_SELECTORS, False),
+            ],
+            'time slots': [
+                ("Complete Booking Form", "time slot radios", [sel.VISIT_TIME_ANY_RADIO], True),
+                ("Complete Booking Form", "enabled slot headers",
+                 [sel.VISIT_TIME_HEADER_CSS.format(value='DAY' if slot == 'ALL DAY' else slot) for slot in preferred_slots], False),
+            ],
+            'contact': [
+                ("Fill Form Details", "first name", sel.FIRST_NAME_SELECTORS, True),
+                ("Fill Form Details", "last name", sel.LAST_NAME_SELECTORS, True),
+                ("Fill Form Details", "email", sel.EMAIL_SELECTORS, True),
+                ("Accept Terms", "terms checkbox", [sel.TERMS_CHECKBOX_XPATH], True),
+                ("Submit Form", "Submit button", [sel.SUBMIT_BUTTON_XPATH], True),
+            ],
+            'confirmation': [
+                ("Confirm Booking", "confirmation screen", sel.CONFIRMATION_SELECTORS, False),
+            ],
+        }
+
+    def run_preflight_check(self, start_url=None, walk_form=False):
+        """
+        Walk landing page -> park booking page -> calendar (-> contact form with
+        walk_form) and check every selector list the mixins use.
+        Returns True if every reachable critical step has a working selector.
+        """
+        self.preflight_results = []
+        settings = self.config.get('settings', {})
+        wait = WebDriverWait(self.driver, settings.get('wait_timeout', 10))
+        if self.target_date is None:
+            self.calculate_target_date()
+
+        checks = self.preflight_check_lists(self.target_date.day)
+        booking_checks, time_checks = checks['booking'], checks['time slots']
+        contact_checks, confirmation_checks = checks['contact'], checks['confirmation']
+
+        # Single find_elements calls must not sit in the implicit wait
+        self.driver.implicitly_wait(0)
+        try:
+            if start_url:
+                self.driver.get(start_url)
+
+            # --- Landing page ---
+            park_selector = checks['landing'][0][2][0]
+            try:
+                wait.until(EC.presence_of_element_located((By.XPATH, park_selector)))
+            except TimeoutException:
+                pass
+            park_check = self.run_checks("landing", checks['landing'])[0]
+
+            reached_booking = False
+            if park_check['winner']:
+                book_button = self.driver.find_element(By.XPATH, park_check['winner'])
+                self.driver.execute_script("arguments[0].click();", book_button)
+                try:
+                    wait.until(EC.presence_of_element_located((By.XPATH, sel.VISIT_DATE_LABEL_XPATH)))
+                    reached_booking = True
+                except TimeoutException:
+                    logger.warning("Pre-flight: booking page did not load after clicking Book a Pass.")
+
+            if not reached_booking:
+                self.mark_unreachable("booking", booking_checks + checks['calendar'] + time_checks)
+                self.mark_unreachable("contact", contact_checks)
+                self.mark_unreachable("confirmation", confirmation_checks)
+                return self.report_preflight()
+
+            # --- Booking page ---
+            booking = {check['label']: check for check in self.run_checks("booking", booking_checks)}
+
+            # --- Calendar ---
+            calendar_open = False
+            if booking['calendar button']['winner']:
+                calendar_button = self.driver.find_element(By.XPATH, booking['calendar button']['winner'])
+                self.driver.execute_script("arguments[0].click();", calendar_button)
+                try:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(sel.DATE_TABLE_SELECTORS))))
+                    calendar_open = True
+                except TimeoutException:
+                    pass
+
+            chosen_date = self.choose_visit_date() if calendar_open else self.target_date
+            calendar_checks = self.preflight_check_lists(chosen_date.day)['calendar']
+            calendar = {check['label']: check for check in self.run_checks("calendar", calendar_checks)}
+
+            # Picking a day only fills in the form; it doesn't book anything
+            open_days = self.read_open_days() if calendar_open else None
+            reached_times = False
+            if calendar['day cell']['winner'] and open_days and open_days.get(chosen_date.date()):
+                day_cell = self.driver.find_element(By.XPATH, calendar['day cell']['winner'])
+                self.driver.execute_script("arguments[0].click();", day_cell)
+                try:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, sel.VISIT_TIME_ANY_RADIO)))
+                    reached_times = True
+                except TimeoutException:
+                    pass
+            else:
+                logger.info("Pre-flight: no open day to pick, so the time slots can't be shown yet.")
+
+            if not reached_times:
+                self.mark_unreachable("time slots", time_checks)
+                self.mark_unreachable("contact", contact_checks)
+                self.mark_unreachable("confirmation", confirmation_checks)
+                return self.report_preflight()
+            times = {check['label']: check for check in self.run_checks("time slots", time_checks)}
+
+            # --- Contact form (optional: it needs pass type, time slot and Next) ---
+            reached_contact = False
+            if walk_form and booking['pass type dropdown']['winner'] and booking['Next button']['winner']:
+                pass_select = Select(self.driver.find_element(By.CSS_SELECTOR, booking['pass type dropdown']['winner']))
+                open_options = [opt for opt in pass_select.options[1:] if opt.get_attribute('value') and opt.is_enabled()]
+                if open_options:
+                    pass_select.select_by_value(open_options[0].get_attribute('value'))
+                if times['enabled slot headers']['winner']:
+                    header = self.driver.find_element(By.CSS_SELECTOR, times['enabled slot headers']['winner'])
+                    self.driver.execute_script("arguments[0].click();", header)
+                next_button = self.driver.find_element(selector_by(booking['Next button']['winner']), booking['Next button']['winner'])
+                next_button.click()
+                try:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(sel.FIRST_NAME_SELECTORS))))
+                    reached_contact = True
+                except TimeoutException:
+                    logger.warning("Pre-flight: contact form did not appear after Next.")
+
+            if reached_contact:
+                self.run_checks("contact", contact_checks)
+            else:
+                self.mark_unreachable("contact", contact_checks)
+            # The confirmation screen is only reachable by booking
+            self.mark_unreachable("confirmation", confirmation_checks)
+            return self.report_preflight()
+
+        except Exception as e:
+            logger.error(f"Pre-flight check failed with an unexpected error: {e}", exc_info=True)
+            return self.report_preflight()
+        finally:
+            self.driver.implicitly_wait(self.config.get('settings', {}).get('wait_timeout', 15))
+
+    def run_fixture_check(self, fixtures_dir):
+        """
+        Evaluate every selector list against each page recorded by dom_recorder.py.
+        A critical list is flagged if it resolves on none of the recorded pages.
+        """
+        self.preflight_results = []
+        if self.target_date is None:
+            self.calculate_target_date()
+        # Each unique page once
+        fixtures = list({fixture['file']: fixture for fixture in load_fixture_index(fixtures_dir)}.values())
+        all_checks = [(page, check) for page, page_checks in self.preflight_check_lists(self.target_date.day).items()
+                      for check in page_checks]
+
+        self.driver.implicitly_wait(0)
+        try:
+            for fixture in fixtures:
+                replay_fixture(self.driver, fixtures_dir, fixture)
+                for _, check in all_checks:
+                    self.check_selectors(fixture['file'], *check)
+        finally:
+            self.driver.implicitly_wait(self.config.get('settings', {}).get('wait_timeout', 15))
+
+        logger.info(f"--- FIXTURE SELECTOR HEALTH ({len(fixtures)} recorded pages) ---")
+        broken = []
+        for page, (step_name, label, _, critical) in all_checks:
+            hits = [check for check in self.preflight_results
+                    if check['step'] == step_name and check['label'] == label and check['winner']]
+            if hits:
+                ms_to_winner = [check['ms_to_winner'] for check in hits]
+                logger.info(f"✅ {step_name} / {label}: resolves on {len(hits)} page(s), "
+                            f"{min(ms_to_winner):.1f}-{max(ms_to_winner):.1f} ms, winner {hits[0]['winner'][:90]}")
+            elif critical and page != 'calendar':
+                # The calendar is closed at step boundaries, so it can't be judged from snapshots
+                broken.append((step_name, label))
+                logger.info(f"❌ {step_name} / {label}: resolves on no recorded page")
+            else:
+                logger.info(f"⚪ {step_name} / {label}: not found on any recorded page")
+
+        if broken:
+            logger.critical("\a🚨🚨🚨 FIXTURE CHECK FAILED: critical selectors match none of the recorded pages 🚨🚨🚨")
+            for step_name, label in broken:
+                logger.critical(f"🚨 {step_name} / {label}")
+            return False
+        return True
+
+    def report_preflight(self):
+        """Log the health report. Alerts loudly if a critical step has no working selector."""
+        logger.info("--- PRE-FLIGHT SELECTOR HEALTH ---")
+        for check in self.preflight_results:
+            resolvable = sum(1 for result in check['selectors'] if result['matches'])
+            total_ms = sum(result['ms'] for result in check['selectors'])
+            if not check['reachable']:
+                status = "⚪ not reached"
+            elif check['winner']:
+                status = "✅"
+            else:
+                status = "❌" if check['critical'] else "⚠️"
+            logger.info(f"{status} [{check['page']}] {check['step']} / {check['label']}: "
+                        f"{resolvable}/{len(check['selectors'])} resolvable, {total_ms:.1f} ms")
+            if check['reachable']:
+                for result in check['selectors']:
+                    mark = "→" if result['selector'] == check['winner'] else " "
+                    detail = result['error'] or f"{result['matches']} match(es)"
+                    logger.info(f"    {mark} {result['ms']:6.1f} ms  {detail:<14} {result['selector'][:110]}")
+
+        broken = [check for check in self.preflight_results
+                  if check['critical'] and check['reachable'] and not check['winner']]
+        if broken:
+            logger.critical("\a🚨🚨🚨 PRE-FLIGHT FAILED: no working selector for these critical steps 🚨🚨🚨")
+            for check in broken:
+                logger.critical(f"🚨 {check['step']} / {check['label']} on the {check['page']} page")
+            logger.critical("🚨 The race will fail at these steps. Fix site_selectors.py before release time.")
+            return False
+
+        logger.info("✅ Pre-flight: every reachable critical step has a working selector.")
+        return True
+
+
+if __name__ == "__main__":
+    from main import AdvancedTicketBot, load_config
+    from offline_site import standin_url, create_offline_driver, quit_offline_driver
+
+    parser = argparse.ArgumentParser(description="Pre-flight selector health check.")
+    parser.add_argument('--url', help="Page to start from (default: the offline stand-in site)")
+    parser.add_argument('--live', action='store_true',
+                        help="Check the real site with the configured (stealth or attached) browser")
+    parser.add_argument('--walk-form', action='store_true',
+                        help="Also select a date, pass and time and click Next to check the contact form (never submits)")
+    parser.add_argument('--fixtures', help="Check selectors against fixture pages built by 'dom_recorder.py fixtures'")
+    parser.add_argument('--show', action='store_true', help="Show the browser instead of running headless")
+    args = parser.parse_args()
+
+    bot = AdvancedTicketBot(load_config())
+    bot.calculate_target_date()
+    if args.live:
+        if not bot.setup_driver():
+            raise SystemExit(1)
+        start_url = args.url or bot.config['ticket_url']
+    else:
+        bot.driver = create_offline_driver(headless=not args.show)
+        # The stand-in can always be walked to the contact form
+        start_url = args.url or standin_url()
+        args.walk_form = True
+
+    try:
+        if args.fixtures and not args.live:
+            healthy = bot.run_fixture_check(args.fixtures)
+        else:
+            healthy = bot.run_preflight_check(start_url, walk_form=args.walk_form)
+    finally:
+        if args.live:
+            if bot.browser_attached:
+                bot.driver.service.stop()
+            else:
+                bot.driver.quit()
+        else:
+            quit_offline_driver(bot.driver)
+    raise SystemExit(0 if healthy else 1)
@@ -0,0 +1,253 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+from datetime import datetime
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(SCRIPT_DIR, "run_history.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    code_version TEXT,
+    config_hash TEXT,
+    target_date TEXT,
+    park TEXT,
+    release_timer_error REAL,
+    result TEXT,
+    failed_step TEXT,
+    total_seconds REAL,
+    confirmation_seconds REAL,
+    confirmation TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    selector TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_name ON steps(name);
+"""
+
+# Columns added after the first release; older databases are migrated on open
+ADDED_RUN_COLUMNS = {
+    'confirmation_seconds': 'REAL',
+    'confirmation': 'TEXT',
+}
+
+
+def config_hash(config):
+    """Stable short hash of a config dict, ignoring personal form data."""
+    hashed = {k: v for k, v in config.items() if k != 'form_data'}
+    payload = json.dumps(hashed, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def code_version():
+    """Current git revision (with -dirty for local edits), or a hash of the sources."""
+    try:
+        result = subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=SCRIPT_DIR, capture_output=True, text=True, timeout=5
+        )
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+    except Exception:
+        pass
+
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(SCRIPT_DIR)):
+        if name.endswith('.py'):
+            with open(os.path.join(SCRIPT_DIR, name), 'rb') as f:
+                digest.update(f.read())
+    return f"src-{digest.hexdigest()[:10]}"
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers (pct in 0-100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class RunHistory:
+    """Records each run and its per-step timings in a local SQLite database."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        # The bot writes from both the event loop and the driver thread
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(runs)")}
+        for column, column_type in ADDED_RUN_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {column_type}")
+        self.conn.commit()
+        self.run_id = None
+        self.step_seq = 0
+
+    def start_run(self, config, target_date):
+        cursor = self.conn.execute(
+            "INSERT INTO runs (started_at, code_version, config_hash, target_date, park) VALUES (?, ?, ?, ?, ?)",
+            (
+                datetime.now().isoformat(timespec='seconds'),
+                code_version(),
+                config_hash(config),
+                target_date.strftime('%Y-%m-%d') if target_date else None,
+                config.get('selected_park'),
+            )
+        )
+        self.conn.commit()
+        self.run_id = cursor.lastrowid
+        self.step_seq = 0
+        return self.run_id
+
+    def record_step(self, name, outcome, duration, selector=None):
+        if self.run_id is None:
+            return
+        self.step_seq += 1
+        self.conn.execute(
+            "INSERT INTO steps (run_id, seq, name, outcome, duration, selector) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_id, self.step_seq, name, outcome, duration, selector)
+        )
+        self.conn.commit()
+
+    def finish_run(self, result, failed_step=None, release_timer_error=None, total_seconds=None,
+                   confirmation_seconds=None, confirmation=None):
+        if self.run_id is None:
+            return
+        self.conn.execute(
+            "UPDATE runs SET result = ?, failed_step = ?, release_timer_error = ?, total_seconds = ?, "
+            "confirmation_seconds = ?, confirmation = ? WHERE id = ?",
+            (result, failed_step, release_timer_error, total_seconds, confirmation_seconds, confirmation, self.run_id)
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def run_filter(last=None, version=None):
+    """
+    Subquery selecting run ids: the last N runs (all runs if last is None),
+    narrowed to one code version if given. Returns (sql, params).
+    """
+    sql = f"SELECT id FROM (SELECT id, code_version FROM runs ORDER BY id DESC LIMIT {int(last) if last else -1})"
+    if version:
+        return sql + " WHERE code_version = ?", [version]
+    return sql, []
+
+
+def load_step_durations(conn, last=None, version=None):
+    """Return {step name: [durations]} for successful steps, in flow order."""
+    runs_sql, params = run_filter(last, version)
+    rows = conn.execute(
+        f"SELECT name, duration FROM steps WHERE outcome = 'ok' AND run_id IN ({runs_sql}) ORDER BY seq",
+        params
+    ).fetchall()
+    durations = {}
+    for name, duration in rows:
+        durations.setdefault(name, []).append(duration)
+    return durations
+
+
+def print_report(db_path=DEFAULT_DB_PATH, last=None, threshold=0.2):
+    """
+    Print per-step p50/p95 across runs and flag regressions between code versions.
+    With last=N, every figure in the report covers only the last N runs.
+    """
+    if not os.path.exists(db_path):
+        logger.error(f"No run history found at {db_path}")
+        return False
+
+    # Opening through RunHistory migrates older databases
+    RunHistory(db_path).close()
+    conn = sqlite3.connect(db_path)
+    runs_sql, _ = run_filter(last)
+    runs = conn.execute(f"SELECT COUNT(*), SUM(result = 'success') FROM runs WHERE id IN ({runs_sql})").fetchone()
+    print(f"\nRuns recorded: {runs[0]} ({runs[1] or 0} confirmed)" + (f", last {last} shown" if last else ""))
+
+    # Headline metric: go-time to confirmed booking
+    confirmation_times = [row[0] for row in conn.execute(
+        f"SELECT confirmation_seconds FROM runs WHERE id IN ({runs_sql}) "
+        "AND result = 'success' AND confirmation_seconds IS NOT NULL")]
+    if confirmation_times:
+        print(f"Time to confirmation: p50 {percentile(confirmation_times, 50):.2f}s, "
+              f"p95 {percentile(confirmation_times, 95):.2f}s")
+
+    durations = load_step_durations(conn, last=last)
+    if not durations:
+        print("No completed steps recorded yet.")
+        conn.close()
+        return True
+
+    print(f"\n{'Step':<28}{'n':>5}{'p50 (s)':>10}{'p95 (s)':>10}{'fail %':>9}  Top selector")
+    for name, values in durations.items():
+        attempts, failures = conn.execute(
+            f"SELECT COUNT(*), SUM(outcome != 'ok') FROM steps WHERE name = ? AND run_id IN ({runs_sql})", (name,)
+        ).fetchone()
+        top_selector = conn.execute(
+            f"SELECT selector FROM steps WHERE name = ? AND selector IS NOT NULL AND run_id IN ({runs_sql}) "
+            "GROUP BY selector ORDER BY COUNT(*) DESC LIMIT 1", (name,)
+        ).fetchone()
+        fail_pct = 100 * (failures or 0) / attempts if attempts else 0
+        selector_text = (top_selector[0][:60] if top_selector else '-')
+        print(f"{name:<28}{len(values):>5}{percentile(values, 50):>10.2f}{percentile(values, 95):>10.2f}{fail_pct:>8.0f}%  {selector_text}")
+
+    timer_errors = [row[0] for row in conn.execute(
+        f"SELECT release_timer_error FROM runs WHERE id IN ({runs_sql}) AND release_timer_error IS NOT NULL")]
+    if timer_errors:
+        print(f"\nRelease timer error: p50 {percentile(timer_errors, 50):+.3f}s, p95 {percentile(timer_errors, 95):+.3f}s")
+
+    # Compare the two most recent code versions step by step
+    versions = [row[0] for row in conn.execute(
+        f"SELECT code_version FROM runs WHERE id IN ({runs_sql}) GROUP BY code_version ORDER BY MAX(id) DESC LIMIT 2")]
+    if len(versions) == 2:
+        current, previous = versions
+        current_durations = load_step_durations(conn, last=last, version=current)
+        previous_durations = load_step_durations(conn, last=last, version=previous)
+        print(f"\nRegression check: {current} vs {previous}")
+        flagged = False
+        for name, values in current_durations.items():
+            if name not in previous_durations:
+                continue
+            new_p50 = percentile(values, 50)
+            old_p50 = percentile(previous_durations[name], 50)
+            # Ignore sub-100ms jitter on fast steps
+            if new_p50 > old_p50 * (1 + threshold) and new_p50 - old_p50 > 0.1:
+                flagged = True
+                print(f"  ⚠️ {name}: p50 {old_p50:.2f}s -> {new_p50:.2f}s")
+        if not flagged:
+            print("  No step regressed.")
+
+    conn.close()
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run history for the BC Parks ticket bot.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report_parser = subparsers.add_parser('report', help="Per-step p50/p95 latency report")
+    report_parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Path to the run history database")
+    report_parser.add_argument('--last', type=int, help="Only include the last N runs")
+    report_parser.add_argument('--threshold', type=float, default=0.2,
+                               help="Flag a step when its p50 grows by more than this fraction")
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        print_report(args.db, last=args.last, threshold=args.threshold)
@@ -0,0 +1,119 @@
+# Every selector list the booking flow uses, in fallback order.
+# The mixins and the pre-flight health check (preflight.py) both read from here,
+# so a renamed class on the site only needs fixing in one place.
+# Entries starting with '//' or '(' are XPath, everything else is CSS.
+# (Named site_selectors so it doesn't shadow the standard library's selectors module.)
+
+LOWER = "translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+
+# --- Landing page ---
+# Format with search_text (lower case)
+PARK_BOOK_BUTTON_XPATH = f"//*[contains({LOWER}, '{{search_text}}')]//following::button[contains({LOWER}, 'book a pass')][1]"
+
+# --- Booking page ---
+VISIT_DATE_LABEL_XPATH = f"//*[contains({LOWER}, 'visit date') and (self::label or self::span or self::div or self::p)]"
+VISIT_DATE_BUTTON_XPATH = f"//*[contains({LOWER}, 'visit date')]//following::button[contains(@class, 'date-input__calendar-btn') and contains(@class, 'form-control') and @title='Select a Date'][1]"
+
+DATE_TABLE_SELECTORS = [
+    "div[ngbdatepickerdayview]",  # Angular Bootstrap specific
+    "ngb-datepicker",
+    "[class*='ngb-dp']",
+    ".datepicker-days",
+    ".table-condensed",
+    "[class*='calendar-days']",
+    "[role='application'][class*='datepicker']",
+    ".datepicker",
+    ".calendar-table",
+    "table[class*='calendar']",
+    ".date-picker-table"
+]
+
+NEXT_MONTH_SELECTORS = [
+    ".datepicker-days .next",
+    ".next",
+    "th.next",
+    "[class*='next']",
+    "//th[@class='next'][1]",
+    "//button[contains(@class, 'next')]",
+    "//a[contains(@class, 'next')]",
+    ".datepicker-switch + .next",
+    "th[title*='next']",
+    "th[title*='Next']"
+]
+
+# Format with target_day
+DAY_XPATH_SELECTORS = [
+    # Angular Bootstrap ngb-datepicker specific selectors
+    "//div[@ngbdatepickerdayview and normalize-space(text())='{target_day}']",
+    "//div[contains(@ngbdatepickerdayview, '') and normalize-space(text())='{target_day}']",
+    "//div[@ngbdatepickerdayview='' and text()='{target_day}']",
+    # More generic Angular Bootstrap selectors
+    "//div[contains(@class, 'btn-light') and normalize-space(text())='{target_day}']",
+    "//div[contains(@class, 'btn') and normalize-space(text())='{target_day}']",
+    # Fallback to traditional selectors
+    "//td[contains(@class, 'day') and not(contains(@class, 'old')) and not(contains(@class, 'new')) and not(contains(@class, 'disabled')) and normalize-space(text())='{target_day}']",
+    "//button[normalize-space(text())='{target_day}' and contains(@class, 'day')]"
+]
+DAY_CSS_FALLBACK = "div[ngbdatepickerdayview], div.btn-light, div[class*='btn']"
+
+DATE_INPUT_XPATHS = [
+    "//input[@id='visitDate']",
+    "//input[contains(@name, 'visit')]",
+    "//input[contains(@name, 'date')]",
+    "//input[@type='date']",
+    "//input[contains(@class, 'date')]"
+]
+
+PASS_TYPE_SELECTORS = [
+    "select[name*='pass']",
+    "select[name*='type']",
+    "select[id*='pass']",
+    "select[id*='type']",
+    ".pass-type select"
+]
+
+VISIT_TIME_ANY_RADIO = "input[type='radio'][name='visitTime']"
+# Format with value (AM, PM or DAY)
+VISIT_TIME_HEADER_CSS = "div.card-header.card-header-enabled:has(input[type='radio'][name='visitTime'][value='{value}'])"
+VISIT_TIME_RADIO_CSS = "input[type='radio'][name='visitTime'][value='{value}']"
+
+NEXT_BUTTON_SELECTORS = [
+    f"//button[contains({LOWER}, 'next')]",
+    "//input[@type='submit' and contains(translate(@value, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'next')]",
+    f"//a[contains({LOWER}, 'next')]",
+    "button[id*='next']",
+    "button[class*='next']",
+    ".next-btn",
+    ".btn-next",
+    "input[type='submit']"
+]
+
+# --- Contact form ---
+FIRST_NAME_SELECTORS = [
+    "#firstName",                                   # HIGHEST PRIORITY: ID
+    "input[formcontrolname='firstName']",           # SECOND PRIORITY: Angular formcontrolname
+    "input[name*='first']", "input[placeholder*='First']" # Fallbacks
+]
+LAST_NAME_SELECTORS = [
+    "#lastName",                                    # HIGHEST PRIORITY: ID
+    "input[formcontrolname='lastName']",            # SECOND PRIORITY: Angular formcontrolname
+    "input[name*='last']", "input[placeholder*='Last']"  # Fallbacks
+]
+EMAIL_SELECTORS = ["input[type='email']", "input[name*='email']", "input[id*='email']"]
+
+# The terms box is the LAST checkbox; the first one is for text reminders
+TERMS_CHECKBOX_XPATH = "(//input[@type='checkbox'])[last()]"
+SUBMIT_BUTTON_XPATH = "//button[contains(., 'Submit')]"
+
+# --- Confirmation page ---
+CONFIRMATION_SELECTORS = [
+    "[class*='confirmation']",
+    "[id*='confirmation']",
+    "app-confirmation",
+]
+# Only error styling counts: role="alert" and .alert-warning/.alert-info are also used for
+# success toasts such as "a confirmation email has been sent"
+ERROR_BANNER_SELECTORS = [
+    ".alert-danger",
+    "[class*='error-message']",
+]
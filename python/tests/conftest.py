@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# The bot's modules live next to this folder and are imported as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import run_history  # noqa: E402
+
+
+@pytest.fixture
+def make_history(tmp_path, monkeypatch):
+    """
+    Build a run history database in a temporary file. Each run is a dict with
+    'steps' [(name, outcome, duration, selector)] and optional 'result',
+    'version', 'release_timer_error' and 'confirmation_seconds'.
+    """
+    def build(runs):
+        db_path = str(tmp_path / "run_history.sqlite3")
+        history = run_history.RunHistory(db_path)
+        for run in runs:
+            monkeypatch.setattr(run_history, 'code_version', lambda: run.get('version', 'v1'))
+            history.start_run({'selected_park': 'joffre_lakes'}, None)
+            for name, outcome, duration, selector in run['steps']:
+                history.record_step(name, outcome, duration, selector)
+            history.finish_run(run.get('result', 'success'), None, run.get('release_timer_error'),
+                               None, run.get('confirmation_seconds'), None)
+        history.close()
+        return db_path
+    return build
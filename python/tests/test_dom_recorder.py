@@ -0,0 +1,44 @@
+import json
+
+from dom_recorder import FIXTURE_CSP, DomRecorder, build_fixtures, load_fixture_index, make_static
+
+PAGE = ('<html><head><title>Book</title><base href="https://reserve.bcparks.ca/">'
+        '<script src="main.js"></script></head><body><button id="next">Next</button>'
+        '<SCRIPT type="module">\nalert(1)\n</SCRIPT ></body></html>')
+
+
+def test_make_static_strips_scripts_and_blocks_network():
+    html = make_static(PAGE, "https://reserve.bcparks.ca/dayuse/?a=1&b=2")
+    assert '<script' not in html.lower()
+    assert '<base' not in html
+    assert '<button id="next">Next</button>' in html
+    assert html.startswith('<html><head>' + FIXTURE_CSP)
+    assert 'content="https://reserve.bcparks.ca/dayuse/?a=1&amp;b=2"' in html
+
+
+def test_make_static_without_head():
+    html = make_static('<div class="confirmation">ok</div>', "about:blank")
+    assert html.startswith(FIXTURE_CSP)
+    assert html.endswith('<div class="confirmation">ok</div>')
+
+
+def test_build_fixtures_shares_files_for_identical_pages(tmp_path):
+    recorder = DomRecorder(str(tmp_path), run_name="run")
+    viewport = {'width': 1280, 'height': 800, 'scrollX': 0, 'scrollY': 0, 'devicePixelRatio': 1}
+    snapshot = {'html': PAGE, 'url': 'https://reserve.bcparks.ca/dayuse/', 'title': 'Book', 'viewport': viewport}
+    recorder.save(snapshot, "Select Park and Book", "entry")
+    recorder.save(snapshot, "Select Park and Book", "exit")
+    recorder.save({**snapshot, 'html': '<html><head></head><body>Contact</body></html>'}, "Fill Form Details", "entry")
+
+    out_dir = build_fixtures(recorder.run_dir)
+    index = load_fixture_index(out_dir)
+    assert [entry['file'] for entry in index] == [
+        "001_select-park-and-book_entry.html",
+        "001_select-park-and-book_entry.html",
+        "003_fill-form-details_entry.html",
+    ]
+    assert index[0]['viewport'] == viewport
+    with open(f"{out_dir}/{index[0]['file']}", encoding='utf-8') as f:
+        assert '<script' not in f.read().lower()
+    with open(f"{recorder.run_dir}/manifest.jsonl", encoding='utf-8') as f:
+        assert [json.loads(line)['seq'] for line in f] == [1, 2, 3]
@@ -0,0 +1,98 @@
+import pytest
+
+from flow_simulator import (RACE_STEPS, REFRESH_STEP, LatencyModel, StepLatency, monte_carlo,
+                            parse_adjustments, simulate_race)
+
+VISIT_DATE = "Select Visit Date"
+
+
+class ScriptedModel:
+    """Plays back fixed (duration, outcome) pairs per step; unscripted steps take 1s and succeed."""
+
+    def __init__(self, script, recorded=()):
+        self.script = {name: list(outcomes) for name, outcomes in script.items()}
+        self.recorded = set(recorded)
+
+    def sample_outcome(self, step_name, adjust=0.0):
+        outcomes = self.script.get(step_name)
+        duration, outcome = outcomes.pop(0) if outcomes else (1.0, 'ok')
+        return duration + adjust, outcome
+
+    def retries_recorded(self, step_name):
+        return step_name in self.recorded
+
+
+def test_clean_race_runs_every_step_once():
+    elapsed, succeeded, step_times = simulate_race(ScriptedModel({}))
+    assert succeeded
+    assert elapsed == len(RACE_STEPS) + 1
+    assert set(step_times) == {REFRESH_STEP} | {name for name, _, _ in RACE_STEPS}
+
+
+def test_hung_visit_date_is_refreshed_and_retried():
+    model = ScriptedModel({VISIT_DATE: [(9.0, 'hung'), (3.0, 'ok')]})
+    elapsed, succeeded, step_times = simulate_race(model)
+    assert succeeded
+    assert step_times[VISIT_DATE] == 12.0
+    assert step_times[REFRESH_STEP] == 2.0
+
+
+def test_plain_failure_ends_the_race_without_retry():
+    model = ScriptedModel({VISIT_DATE: [(9.0, 'failed'), (3.0, 'ok')]})
+    _, succeeded, step_times = simulate_race(model)
+    assert not succeeded
+    assert step_times[REFRESH_STEP] == 1.0
+    assert "Confirm Booking" not in step_times
+
+
+def test_recorded_retries_are_not_simulated_again():
+    model = ScriptedModel({VISIT_DATE: [(9.0, 'hung'), (3.0, 'ok')]}, recorded={VISIT_DATE})
+    _, succeeded, _ = simulate_race(model)
+    assert not succeeded
+
+
+def test_steps_without_retry_fail_even_when_hung():
+    model = ScriptedModel({"Submit Form": [(30.0, 'hung'), (1.0, 'ok')]})
+    _, succeeded, _ = simulate_race(model)
+    assert not succeeded
+
+
+def test_from_history_forecast_matches_recorded_failure_rate(make_history):
+    runs = []
+    for i in range(20):
+        visit_outcome = 'failed' if i % 2 else 'ok'
+        runs.append({'steps': [(REFRESH_STEP, 'ok', 2.0, None), (VISIT_DATE, visit_outcome, 4.0, None)] +
+                              [(name, 'ok', 1.0, None) for name, _, _ in RACE_STEPS if name != VISIT_DATE]})
+    model = LatencyModel.from_history(make_history(runs), seed=1)
+
+    assert model.steps[VISIT_DATE].fail_rate == 0.5
+    assert model.retries_recorded(VISIT_DATE)
+    summary = monte_carlo(model, iterations=4000)
+    assert summary['success_rate'] == pytest.approx(0.5, abs=0.03)
+
+
+def test_from_history_last_uses_only_recent_runs(make_history):
+    runs = [{'steps': [(VISIT_DATE, 'failed', 9.0, None)]}] * 3 + [{'steps': [(VISIT_DATE, 'ok', 4.0, None)]}] * 2
+    model = LatencyModel.from_history(make_history(runs), last=2)
+    assert model.steps[VISIT_DATE].fail_rate == 0.0
+    assert model.steps[VISIT_DATE].samples == [4.0, 4.0]
+
+
+def test_profile_retry_fraction_splits_failures():
+    always_hangs = LatencyModel({VISIT_DATE: StepLatency(p50=1.0, fail_rate=1.0, retry_fraction=1.0)}, seed=1)
+    never_hangs = LatencyModel({VISIT_DATE: StepLatency(p50=1.0, fail_rate=1.0)}, seed=1)
+    assert always_hangs.sample_outcome(VISIT_DATE)[1] == 'hung'
+    assert never_hangs.sample_outcome(VISIT_DATE)[1] == 'failed'
+    assert never_hangs.sample(VISIT_DATE)[1] is False
+
+
+def test_unknown_steps_take_no_time():
+    assert LatencyModel({}).sample_outcome("Nothing") == (0.0, 'ok')
+
+
+def test_parse_adjustments():
+    assert parse_adjustments(["Select Visit Date=-1", " Submit Form = 0.5"]) == {
+        "Select Visit Date": -1.0, "Submit Form": 0.5}
+    # Only the last '=' separates the step name from the seconds
+    assert parse_adjustments(["A=B=2"]) == {"A=B": 2.0}
+    assert parse_adjustments(None) == {}
@@ -0,0 +1,65 @@
+import sqlite3
+
+from run_history import config_hash, load_step_durations, percentile, print_report, run_filter
+
+
+def test_percentile_interpolates_between_values():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([4, 1, 3, 2], 0) == 1
+    assert percentile([4, 1, 3, 2], 100) == 4
+    assert percentile([5], 95) == 5
+    assert percentile([], 50) is None
+
+
+def test_config_hash_ignores_form_data_and_key_order():
+    config = {'selected_park': 'joffre_lakes', 'settings': {'a': 1, 'b': 2}, 'form_data': {'email': 'a@b.c'}}
+    reordered = {'settings': {'b': 2, 'a': 1}, 'selected_park': 'joffre_lakes', 'form_data': {'email': 'x@y.z'}}
+    assert config_hash(config) == config_hash(reordered)
+    assert config_hash(config) != config_hash({**config, 'selected_park': 'garibaldi'})
+    assert len(config_hash(config)) == 12
+
+
+def test_load_step_durations_keeps_successes_in_flow_order(make_history):
+    db_path = make_history([
+        {'steps': [('Refresh Site', 'ok', 2.0, None), ('Select Visit Date', 'failed', 9.0, None)]},
+        {'steps': [('Refresh Site', 'ok', 3.0, None), ('Select Visit Date', 'ok', 4.0, None)]},
+    ])
+    with sqlite3.connect(db_path) as conn:
+        durations = load_step_durations(conn)
+        assert list(durations) == ['Refresh Site', 'Select Visit Date']
+        assert sorted(durations['Refresh Site']) == [2.0, 3.0]
+        assert durations['Select Visit Date'] == [4.0]
+        assert load_step_durations(conn, last=1) == {'Refresh Site': [3.0], 'Select Visit Date': [4.0]}
+
+
+def test_run_filter_combines_last_and_version(make_history):
+    db_path = make_history([
+        {'version': 'v1', 'steps': []},
+        {'version': 'v2', 'steps': []},
+        {'version': 'v1', 'steps': []},
+    ])
+    with sqlite3.connect(db_path) as conn:
+        def ids(last=None, version=None):
+            sql, params = run_filter(last, version)
+            return sorted(row[0] for row in conn.execute(sql, params))
+        assert ids() == [1, 2, 3]
+        assert ids(last=2) == [2, 3]
+        assert ids(version='v1') == [1, 3]
+        assert ids(last=2, version='v1') == [3]
+
+
+def test_report_last_applies_to_every_figure(make_history, capsys):
+    old_failures = [{'result': 'failed', 'steps': [('Select Visit Date', 'failed', 9.0, 'old')]}] * 5
+    recent = [{'confirmation_seconds': 10.0 + i, 'release_timer_error': 0.01,
+               'steps': [('Select Visit Date', 'ok', 4.0, 'new')]} for i in range(5)]
+    db_path = make_history(old_failures + recent)
+
+    assert print_report(db_path, last=5)
+    report = capsys.readouterr().out
+    assert "Runs recorded: 5 (5 confirmed)" in report
+    step_line = next(line for line in report.splitlines() if line.startswith("Select Visit Date"))
+    assert step_line.split()[-2:] == ['0%', 'new']
+
+    assert print_report(db_path)
+    step_line = next(line for line in capsys.readouterr().out.splitlines() if line.startswith("Select Visit Date"))
+    assert '50%' in step_line